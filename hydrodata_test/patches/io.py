@@ -18,14 +18,24 @@ pfb files:
 +-------------------------+------------------+---------------------+
 """
 
-from functools import partial
+import asyncio
+from collections import OrderedDict
+from contextlib import contextmanager
+import hashlib
+from concurrent.futures import (
+    Executor, ProcessPoolExecutor, ThreadPoolExecutor)
+from functools import lru_cache, partial
 import itertools
 import json
 from pathlib import Path
+from types import MappingProxyType
 try:
     from numba import jit, njit
+    HAS_NUMBA = True
 except ImportError:
     # Some systems may not have numba capabilities
+    HAS_NUMBA = False
+
     def jit(*args, **kwargs):
         """Dummy decorator, does nothing"""
         def _decorator(func):
@@ -34,8 +44,12 @@ except ImportError:
 
 from numbers import Number
 import numpy as np
+import os
 import struct
-from typing import Mapping, List, Union, Iterable
+import threading
+import time
+import warnings
+from typing import Mapping, List, NamedTuple, Union, Iterable
 import yaml
 
 from .hydrology import (
@@ -54,8 +68,23 @@ try:
 except ImportError:
     from yaml import Dumper as YAMLDumper
 
+try:
+    import blosc2
+except ImportError:
+    # Only needed for compressed pfb files
+    blosc2 = None
+
 
-def read_pfb(file: str, keys: dict=None, mode: str='full', z_first: bool=True):
+def read_pfb(
+    file: str,
+    keys: dict=None,
+    mode: str='full',
+    z_first: bool=True,
+    workers: int=None,
+    dtype=np.float64,
+    step: Iterable[int]=None,
+    pool: 'ReaderPool'=None
+):
     """
     Read a single pfb file, and return the data therein
 
@@ -74,13 +103,36 @@ def read_pfb(file: str, keys: dict=None, mode: str='full', z_first: bool=True):
     :param mode:
         The mode for the reader. See ``ParflowBinaryReader::read_all_subgrids``
         for more information about what modes are available.
+    :param workers:
+        The number of threads used to decode subgrids when reading the
+        full file. Optional, by default subgrids are decoded serially.
+    :param dtype:
+        The data type of the returned array. Pfb files hold 64 bit floats,
+        asking for ``np.float32`` converts them while byteswapping, which
+        halves the memory used without an extra copy. Default is float64.
+    :param step:
+        A (step_z, step_y, step_x) tuple to only read every step'th cell
+        along each axis, for example to make previews and overviews of
+        large grids. Optional, by default every cell is read.
+    :param pool:
+        A ``ReaderPool`` to borrow the reader of the file from, which saves
+        opening the file and reading its header on repeated reads.
+        Optional, by default the file is opened for this read.
     :return:
         An nd array containing the data from the pfb file.
     """
-    with ParflowBinaryReader(file) as pfb:
-        if not keys:
-            data = pfb.read_all_subgrids(mode=mode, z_first=z_first)
+    cache_file = None
+    if _PFB_CACHE['dir'] is not None and mode == 'full':
+        cache_file = _pfb_cache_file(file)
+        cached = _load_cached_pfb(cache_file)
+        if cached is not None:
+            return _from_cached_pfb(cached, keys, z_first, dtype, step)
+    with _open_reader(file, pool) as pfb:
+        if not keys and not step:
+            data = pfb.read_all_subgrids(
+                mode=mode, z_first=z_first, workers=workers, dtype=dtype)
         else:
+            keys = keys or {}
             base_header = pfb.header
             start_x = keys.get('x', {}).get('start', None) or 0
             start_y = keys.get('y', {}).get('start', None) or 0
@@ -92,10 +144,136 @@ def read_pfb(file: str, keys: dict=None, mode: str='full', z_first: bool=True):
             ny = np.max([stop_y - start_y, 1])
             nz = np.max([stop_z - start_z, 1])
             data = pfb.read_subarray(
-                        start_x, start_y, start_z, nx, ny, nz, z_first=z_first)
+                        start_x, start_y, start_z, nx, ny, nz,
+                        z_first=z_first, dtype=dtype, step=step)
+    if (cache_file is not None and not keys and not step
+            and data.dtype == np.float64):
+        _add_cached_pfb(cache_file, data if z_first else data.T)
     return data
 
 
+# -----------------------------------------------------------------------------
+
+# Static inputs (masks, slopes, coordinates) are read in full by every
+# worker and every script, each paying for the byteswap and transpose.
+# The opt-in pfb cache keeps native-endian, C-ordered .npy copies of the
+# files read in full by ``read_pfb``, named after a hash of their path,
+# size and modification time, so that later reads are memory mapped with
+# no decoding. Entries are evicted least recently used first.
+PFB_CACHE_ENV = 'PARFLOW_PFB_CACHE'
+PFB_CACHE_MAX_BYTES = 4 * 1024 ** 3
+
+_PFB_CACHE = {'dir': None, 'max_bytes': PFB_CACHE_MAX_BYTES, 'read_only': False}
+
+
+def set_pfb_cache(
+    cache_dir: str=None,
+    max_bytes: int=PFB_CACHE_MAX_BYTES,
+    read_only: bool=False
+):
+    """
+    Turn on the cache of pfb files read in full by ``read_pfb``. It can
+    also be turned on for every process by setting the environment
+    variable ``PARFLOW_PFB_CACHE`` to the cache directory, which is
+    convenient for pools of workers. The directory can be shared between
+    processes and kept between runs.
+
+    Only reads of whole files with ``mode='full'`` add entries, but reads
+    of windows are also served from the cache when their file is in it.
+
+    :param cache_dir:
+        The directory to keep the cached copies in, created if missing.
+        None turns the cache off.
+    :param max_bytes:
+        The total size of the cached copies, beyond which the least
+        recently used are deleted. Default is 4 GiB.
+    :param read_only:
+        Whether reads of whole float64 files return the read-only memory
+        map of the cached copy instead of a copy of it. This saves memory
+        when many processes read the same file, since they share the
+        pages of the cached copy. Default is False.
+    """
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+    _PFB_CACHE.update(dir=cache_dir, max_bytes=max_bytes, read_only=read_only)
+
+
+def clear_pfb_cache():
+    """Delete every cached copy in the pfb cache directory"""
+    if _PFB_CACHE['dir'] is not None:
+        _evict_pfb_cache(0)
+
+
+def _pfb_cache_file(file) -> str:
+    stat = os.stat(file)
+    key = f'{os.path.abspath(file)}:{stat.st_size}:{stat.st_mtime_ns}'
+    name = hashlib.sha1(key.encode()).hexdigest()
+    return os.path.join(_PFB_CACHE['dir'], f'{name}.npy')
+
+
+def _load_cached_pfb(cache_file):
+    """Memory map a cached copy, or return None if it is not cached"""
+    try:
+        data = np.load(cache_file, mmap_mode='r')
+        # The modification time of an entry is when it was last used
+        os.utime(cache_file)
+    except (FileNotFoundError, ValueError):
+        return None
+    return data
+
+
+def _from_cached_pfb(cached, keys, z_first, dtype, step=None):
+    nz, ny, nx = cached.shape
+    (start_x, start_y, start_z), (nx, ny, nz) = _window_from_keys(
+        {'nx': nx, 'ny': ny, 'nz': nz}, keys)
+    step_z, step_y, step_x = step or (1, 1, 1)
+    if (not keys and not step and _PFB_CACHE['read_only']
+            and dtype == np.float64):
+        data = cached
+    else:
+        data = np.array(cached[start_z:start_z + nz:step_z,
+                               start_y:start_y + ny:step_y,
+                               start_x:start_x + nx:step_x], dtype=dtype)
+    return data if z_first else data.T
+
+
+def _add_cached_pfb(cache_file, data):
+    if data.nbytes > _PFB_CACHE['max_bytes']:
+        return
+    _evict_pfb_cache(_PFB_CACHE['max_bytes'] - data.nbytes)
+    # Written under a temporary name so that other processes never
+    # load a partial copy
+    tmp_file = f'{cache_file}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_file, 'wb') as f:
+        np.save(f, np.ascontiguousarray(data))
+    os.replace(tmp_file, cache_file)
+
+
+def _evict_pfb_cache(max_bytes):
+    """Delete the least recently used entries until they fit in max_bytes"""
+    entries = []
+    for entry in os.scandir(_PFB_CACHE['dir']):
+        if entry.name.endswith('.npy'):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+if os.environ.get(PFB_CACHE_ENV):
+    set_pfb_cache(os.environ[PFB_CACHE_ENV])
+
+
 # -----------------------------------------------------------------------------
 
 def write_pfb(
@@ -104,6 +282,8 @@ def write_pfb(
     x=0.0, y=0.0, z=0.0,
     dx=1.0, dy=1.0, dz=1.0,
     z_first=True, dist=True,
+    workers=None,
+    index=False,
     **kwargs
 ):
     """
@@ -144,10 +324,89 @@ def write_pfb(
         Whether the z-axis should be first or last.
     :param dist:
         Whether to write the distfile in addition to the pfb.
+    :param workers:
+        The number of threads used to encode and write subgrids.
+        Optional, by default subgrids are written serially.
+    :param index:
+        Whether to write a sidecar index of the subgrid layout in addition
+        to the pfb, see ``write_pfb_index``. Default is False.
     :param kwargs:
         Extra keyword arguments, primarily to eat unnecessary
         args by passing in a dictionary with `**dict`.
     """
+    array, nx, ny, nz = _prepare_array_for_pfb(array, z_first)
+    n_subgrids = p * q * r
+    # All the subgrid info here
+    layout = get_subgrid_layout(nx, ny, nz, p, q, r)
+    sg_offs, sg_starts, sg_shapes = (
+        layout.offsets, layout.start_indices, layout.shapes)
+
+    file_header = struct.pack(
+        '>dddiiidddi',
+        float(x), float(y), float(z),
+        int(nx), int(ny), int(nz),
+        float(dx), float(dy), float(dz),
+        int(n_subgrids)
+    )
+    # All subgrid headers at once: ix, iy, iz, nx, ny, nz, rx, ry, rz
+    sg_headers = np.hstack(
+        [sg_starts, sg_shapes, np.ones_like(sg_shapes)]
+    ).astype('>i4')
+    # Each subgrid is its header followed by its data, and subgrids are
+    # stored back to back. Contiguous runs of subgrids are encoded into
+    # a single buffer of bounded size and written with one call.
+    sg_bytes = 36 + 8 * np.prod(sg_shapes, axis=1)
+    file_size = int(64 + np.sum(sg_bytes))
+    batch_ids = (np.cumsum(sg_bytes) - sg_bytes) // _WRITE_BATCH_BYTES
+    batches = np.split(
+        np.arange(n_subgrids), np.flatnonzero(np.diff(batch_ids)) + 1)
+
+    def _write_batch(subgrids):
+        batch_start = sg_offs[subgrids[0]] - 36
+        buf = np.empty(int(np.sum(sg_bytes[subgrids])), dtype=np.uint8)
+        for i in subgrids:
+            sg_start = sg_offs[i] - 36 - batch_start
+            buf[sg_start:sg_start + 36] = sg_headers[i].view(np.uint8)
+            s_ix, s_iy, s_iz = sg_starts[i]
+            n_ix, n_iy, n_iz = sg_shapes[i]
+            # Byteswapping and reordering happen in the same copy
+            sg_data = (buf[sg_start + 36:sg_start + sg_bytes[i]]
+                       .view('>f8')
+                       .reshape((n_ix, n_iy, n_iz), order='F'))
+            if z_first:
+                sg_data[...] = array[s_iz:s_iz+n_iz,
+                                     s_iy:s_iy+n_iy,
+                                     s_ix:s_ix+n_ix].T
+            else:
+                sg_data[...] = array[s_ix:s_ix+n_ix,
+                                     s_iy:s_iy+n_iy,
+                                     s_iz:s_iz+n_iz]
+        _pwrite_all(fd, buf, batch_start)
+
+    fd = os.open(file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        # Preallocate, so that batches can be written in any order
+        os.ftruncate(fd, file_size)
+        _pwrite_all(fd, file_header, 0)
+        _thread_map(_write_batch, batches, workers)
+    finally:
+        os.close(fd)
+
+    # Create the .dist file if requested
+    if dist:
+        write_dist(file, sg_offs)
+    if index:
+        _write_pfb_index(
+            file, sg_offs, sg_starts, sg_shapes, p, q, r, file_size)
+
+
+def _prepare_array_for_pfb(array, z_first):
+    """
+    Check that an array can be written to a pfb file and get its size.
+
+    :return:
+        A tuple of (3d array, nx, ny, nz)
+    """
     if array.dtype != np.float64:
         raise ValueError(f"Arrays written to pfb must be of type np.float64!"
                           + " Found {array.dtype} instead!")
@@ -163,58 +422,123 @@ def write_pfb(
         array = np.expand_dims(array, axis=0 if z_first else -1)
     else:
         raise ValueError("Array must be 2 or 3 dimensional to write to pfb!")
+    return array, nx, ny, nz
 
+
+# -----------------------------------------------------------------------------
+
+# Compressed pfb files start with this marker, followed by the usual pfb
+# file header, the subgrid topology (p, q, r) and an index with the byte
+# offset of each compressed subgrid (plus one for the end of the file).
+# Every subgrid is an independent blosc2 chunk holding the same big-endian,
+# Fortran ordered data as an uncompressed pfb, without the subgrid header.
+COMPRESSED_PFB_MAGIC = b'PFBZ'
+
+
+def write_compressed_pfb(
+    file, array,
+    p=1, q=1, r=1,
+    x=0.0, y=0.0, z=0.0,
+    dx=1.0, dy=1.0, dz=1.0,
+    z_first=True,
+    clevel=5,
+    workers=None,
+    **kwargs
+):
+    """
+    Write a single compressed pfb file. Compressed pfb files can be read
+    with ``read_pfb``, ``read_pfb_sequence`` and the ``ParflowBinaryReader``
+    exactly like regular pfb files, but not by ParFlow itself. Since each
+    subgrid is compressed on its own, reading a subarray only has to read
+    and decompress the subgrids it overlaps.
+
+    Requires the ``blosc2`` package.
+
+    :param file:
+        The name of the file to write the array to.
+    :param array:
+        The array to write.
+    :param p:
+        Number of subgrids in the x direction.
+    :param q:
+        Number of subgrids in the y direction.
+    :param r:
+        Number of subgrids in the z direction.
+    :param x:
+        The length of the x-axis
+    :param y:
+        The length of the y-axis
+    :param z:
+        The length of the z-axis
+    :param dx:
+        The spacing between cells in the x direction
+    :param dy:
+        The spacing between cells in the y direction
+    :param dz:
+        The spacing between cells in the z direction
+    :param z_first:
+        Whether the z-axis should be first or last.
+    :param clevel:
+        The blosc2 compression level, from 0 to 9.
+    :param workers:
+        The number of threads used to compress subgrids.
+        Optional, by default subgrids are compressed serially.
+    :param kwargs:
+        Extra keyword arguments, primarily to eat unnecessary
+        args by passing in a dictionary with `**dict`.
+    """
+    _require_blosc2()
+    array, nx, ny, nz = _prepare_array_for_pfb(array, z_first)
     n_subgrids = p * q * r
-    # All the subgrid info here
-    sg_offs, sg_locs, sg_starts, sg_shapes = precalculate_subgrid_info(
-        nx, ny, nz, p, q, r
-    )
+    layout = get_subgrid_layout(nx, ny, nz, p, q, r)
 
+    def _compress_subgrid(i):
+        s_ix, s_iy, s_iz = layout.start_indices[i]
+        n_ix, n_iy, n_iz = layout.shapes[i]
+        sg_data = np.empty((n_ix, n_iy, n_iz), dtype='>f8', order='F')
+        if z_first:
+            sg_data[...] = array[s_iz:s_iz+n_iz,
+                                 s_iy:s_iy+n_iy,
+                                 s_ix:s_ix+n_ix].T
+        else:
+            sg_data[...] = array[s_ix:s_ix+n_ix,
+                                 s_iy:s_iy+n_iy,
+                                 s_iz:s_iz+n_iz]
+        return blosc2.compress(
+            sg_data.ravel(order='K'),
+            typesize=8,
+            clevel=clevel,
+            codec=blosc2.Codec.ZSTD,
+            filter=blosc2.Filter.BITSHUFFLE,
+        )
+
+    chunks = _thread_map(_compress_subgrid, range(n_subgrids), workers)
+    file_header = COMPRESSED_PFB_MAGIC + struct.pack(
+        '>dddiiidddiiii',
+        float(x), float(y), float(z),
+        int(nx), int(ny), int(nz),
+        float(dx), float(dy), float(dz),
+        int(n_subgrids),
+        int(p), int(q), int(r)
+    )
+    index_bytes = 8 * (n_subgrids + 1)
+    chunk_offsets = (len(file_header) + index_bytes + np.concatenate(
+        [[0], np.cumsum([len(c) for c in chunks])])).astype('>u8')
     with open(file, 'wb') as f:
-        # Write the file header
-        f.write(struct.pack('>d', float(x)))
-        f.write(struct.pack('>d', float(y)))
-        f.write(struct.pack('>d', float(z)))
-        f.write(struct.pack('>i', int(nx)))
-        f.write(struct.pack('>i', int(ny)))
-        f.write(struct.pack('>i', int(nz)))
-        f.write(struct.pack('>d', float(dx)))
-        f.write(struct.pack('>d', float(dy)))
-        f.write(struct.pack('>d', float(dz)))
-        f.write(struct.pack('>i', int(n_subgrids)))
-
-        # loop over subgrids:
-        for off, loc, start, shape in zip(sg_offs, sg_locs, sg_starts, sg_shapes):
-            # Write the subgrid header
-            for sgh in itertools.chain(start, shape, [1,1,1]):
-                f.write(struct.pack('>i', int(sgh)))
-
-            mm = np.memmap(
-                file,
-                dtype=np.float64,
-                mode='r+',
-                offset=off,
-                shape=tuple(shape),
-                order='F'
-            )
-            # Gather shapes & extents
-            s_ix, s_iy, s_iz = start
-            n_ix, n_iy, n_iz = shape
-            if z_first:
-                mm[:] = array[s_iz:s_iz+n_iz,
-                              s_iy:s_iy+n_iy,
-                              s_ix:s_ix+n_ix].T.byteswap()
-            else:
-                mm[:] = array[s_ix:s_ix+n_ix,
-                              s_iy:s_iy+n_iy,
-                              s_iz:s_iz+n_iz].byteswap()
-            # Seek to offset + the size of the subgrid
-            f.seek(off + 8 * np.prod(shape))
+        f.write(file_header)
+        f.write(chunk_offsets.tobytes())
+        for chunk in chunks:
+            f.write(chunk)
+
+
+def _require_blosc2():
+    """Raise an informative error if blosc2 is not available"""
+    if blosc2 is None:
+        raise ImportError('The blosc2 package is required '
+                          'for reading or writing compressed pfb files')
 
-    # Create the .dist file if requested
-    if dist:
-        write_dist(file, sg_offs)
 
+# -----------------------------------------------------------------------------
 
 def write_dist(file, sg_offs):
     """
@@ -225,11 +549,113 @@ def write_dist(file, sg_offs):
     :param sg_offs:
         The subgrid offsets.
     """
+    # Need to account for header bytes
+    real_offs = np.array(sg_offs, dtype=np.int64) - 36
+    if len(real_offs):
+        real_offs[0] -= 64
     with open(file + ".dist", "w+") as dist_fp:
-        for i, s in enumerate(sg_offs):
-            # Need to account for header bytes
-            real_off = s - 100 if i == 0 else s - 36
-            dist_fp.write(f'{real_off}\n')
+        dist_fp.write(''.join(f'{off}\n' for off in real_offs))
+    _forget_sidecar_listing(file)
+
+
+# Sidecar index files hold the complete subgrid layout of a pfb file, so
+# that opening it needs no computation and no reads of subgrid headers.
+# The index is this marker, then (n_subgrids, p, q, r) and the size of the
+# pfb file, followed by the byte offset of the data of each subgrid, the
+# lower left indices of all subgrids and their shapes, all big-endian.
+PFB_INDEX_MAGIC = b'PFBI'
+PFB_INDEX_SUFFIX = '.pfbidx'
+
+
+def write_pfb_index(file):
+    """
+    Write a sidecar index of the subgrid layout of an existing pfb file.
+    The layout is found just like when opening the file with the
+    ``ParflowBinaryReader``, which is slow for files without a ``.dist``
+    file or subgrid topology, and for files whose subgrids are not sized
+    like ParFlow sizes them. With the index, later opens are cheap.
+
+    :param file:
+        The pfb file to index. The index is written next to it with
+        ``.pfbidx`` appended to the name.
+    """
+    with ParflowBinaryReader(file) as pfb:
+        if pfb.compressed:
+            raise ValueError(f'Compressed pfb file {file} has its '
+                             'subgrid index built in')
+        _write_pfb_index(
+            file,
+            pfb.subgrid_offsets,
+            pfb.subgrid_start_indices,
+            pfb.subgrid_shapes,
+            pfb.header['p'], pfb.header['q'], pfb.header['r'],
+            pfb._file_size(),
+        )
+
+
+def _write_pfb_index(
+    file, offsets, start_indices, shapes, p, q, r, file_size
+):
+    """Backend for ``write_pfb_index`` from a known subgrid layout"""
+    with open(f'{file}{PFB_INDEX_SUFFIX}', 'wb') as f:
+        f.write(PFB_INDEX_MAGIC)
+        f.write(struct.pack(
+            '>iiiiq', len(offsets), int(p), int(q), int(r), int(file_size)))
+        f.write(np.asarray(offsets).astype('>i8').tobytes())
+        f.write(np.asarray(start_indices).astype('>i4').tobytes())
+        f.write(np.asarray(shapes).astype('>i4').tobytes())
+    _forget_sidecar_listing(file)
+
+
+# How long a listing of the sidecar files (indexes and .dist files) in a
+# directory is used for, see `_has_sidecar`
+SIDECAR_LISTING_SECONDS = 10.0
+
+_SIDECAR_SUFFIXES = (PFB_INDEX_SUFFIX, '.dist')
+_SIDECAR_LISTINGS = {}
+_SIDECAR_LISTINGS_LOCK = threading.Lock()
+
+
+def _has_sidecar(file: str, suffix: str) -> bool:
+    """
+    Whether a pfb file may have a sidecar file, from a listing of the
+    sidecar files in its directory. The listing is kept for
+    ``SIDECAR_LISTING_SECONDS``, so that opening many files in a directory
+    does not look for the sidecars of each of them, which costs a round
+    trip to the server on network filesystems. Sidecars only make opening
+    files faster, so one written by another process while a listing is
+    kept is only missed until the listing is renewed.
+
+    :param file:
+        The pfb file.
+    :param suffix:
+        The suffix of the sidecar file, added to the name of the pfb file.
+    :returns:
+        Whether the sidecar file was in the listing, or True if the
+        directory could not be listed.
+    """
+    directory, name = os.path.split(os.path.abspath(file))
+    now = time.monotonic()
+    with _SIDECAR_LISTINGS_LOCK:
+        listing = _SIDECAR_LISTINGS.get(directory)
+    if listing is None or now - listing[0] > SIDECAR_LISTING_SECONDS:
+        try:
+            with os.scandir(directory) as entries:
+                names = frozenset(e.name for e in entries
+                                  if e.name.endswith(_SIDECAR_SUFFIXES))
+        except OSError:
+            return True
+        listing = (now, names)
+        with _SIDECAR_LISTINGS_LOCK:
+            _SIDECAR_LISTINGS[directory] = listing
+    return f'{name}{suffix}' in listing[1]
+
+
+def _forget_sidecar_listing(file: str):
+    """Drop the listing of the directory of a sidecar file written here"""
+    directory = os.path.dirname(os.path.abspath(file))
+    with _SIDECAR_LISTINGS_LOCK:
+        _SIDECAR_LISTINGS.pop(directory, None)
 
 
 # -----------------------------------------------------------------------------
@@ -238,7 +664,10 @@ def read_pfb_sequence(
     file_seq: Iterable[str],
     keys=None,
     z_first: bool=True,
-    z_is: str='z'
+    z_is: str='z',
+    workers: int=None,
+    dtype=np.float64,
+    pool: 'ReaderPool'=None
 ):
     """
     An efficient wrapper to read a sequence of pfb files. This
@@ -253,72 +682,1256 @@ def read_pfb_sequence(
         This is mainly a trick for interfacing with xarray, but the format
         of the keys is:
 
-            ::
-            {'x': {'start': start_x, 'stop': end_x},
-             'y': {'start': start_y, 'stop': end_y},
-             'z': {'start': start_z, 'stop': end_z}}
+            ::
+            {'x': {'start': start_x, 'stop': end_x},
+             'y': {'start': start_y, 'stop': end_y},
+             'z': {'start': start_z, 'stop': end_z}}
+
+    :param z_first:
+        Whether the z dimension should be first. If true returned arrays have
+        dimensions ('z', 'y', 'x') else ('x', 'y', 'z')
+    :param z_is:
+        A descriptor of what the z axis represents. Can be one of
+        'z', 'time', 'variable'. Default is 'z'.
+    :param workers:
+        The number of threads used to open and read files concurrently.
+        Each thread reads its files directly into their slice of the
+        output. This hides per-file latency on network filesystems.
+        Optional, by default files are read one after another.
+    :param dtype:
+        The data type of the returned array. Pfb files hold 64 bit floats,
+        asking for ``np.float32`` converts them while byteswapping, which
+        halves the memory used without an extra copy. Default is float64.
+    :param pool:
+        A ``ReaderPool`` to borrow the readers of the files from, see
+        ``read_pfb``. Optional, by default every file is opened.
+
+    :return:
+        An nd array containing the data from the files.
+    """
+    pfb_seq, read_file, n_seq = _plan_pfb_sequence(
+        file_seq, keys, z_first, z_is, dtype, pool)
+    _thread_map(read_file, range(n_seq), workers)
+    return pfb_seq
+
+
+async def read_pfb_sequence_async(
+    file_seq: Iterable[str],
+    keys=None,
+    z_first: bool=True,
+    z_is: str='z',
+    max_in_flight: int=64,
+    executor: Executor=None,
+    dtype=np.float64
+):
+    """
+    An asyncio version of ``read_pfb_sequence``. The blocking opens and
+    reads of each file run on an executor, with up to ``max_in_flight``
+    files being read at any time, and every file is placed in the output
+    as soon as it arrives. On network filesystems, where every open costs
+    a round trip, overlapping many files is what makes reads fast.
+    This can be awaited from notebooks and async web services:
+
+        ::
+        data = await read_pfb_sequence_async(files, max_in_flight=128)
+
+    :param file_seq:
+        An iterable sequence of file names to be read.
+    :param keys:
+        A set of keys for indexing subarrays of the full pfb. Optional.
+        See ``read_pfb_sequence`` for the format.
+    :param z_first:
+        Whether the z dimension should be first. If true returned arrays have
+        dimensions ('z', 'y', 'x') else ('x', 'y', 'z')
+    :param z_is:
+        A descriptor of what the z axis represents. Can be one of
+        'z', 'time', 'variable'. Default is 'z'.
+    :param max_in_flight:
+        The maximum number of files being read concurrently.
+    :param executor:
+        The executor to run blocking reads on. Optional, by default a
+        thread pool with ``max_in_flight`` threads is used for this call.
+    :param dtype:
+        The data type of the returned array, see ``read_pfb_sequence``.
+
+    :return:
+        An nd array containing the data from the files.
+    """
+    loop = asyncio.get_running_loop()
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=max_in_flight)
+    try:
+        pfb_seq, read_file, n_seq = await loop.run_in_executor(
+            executor, _plan_pfb_sequence,
+            file_seq, keys, z_first, z_is, dtype)
+        in_flight = asyncio.Semaphore(max_in_flight)
+
+        async def _read_file(i):
+            async with in_flight:
+                await loop.run_in_executor(executor, read_file, i)
+
+        await asyncio.gather(*(_read_file(i) for i in range(n_seq)))
+    finally:
+        if own_executor:
+            executor.shutdown(wait=False)
+    return pfb_seq
+
+
+def _plan_pfb_sequence(
+    file_seq, keys, z_first, z_is, dtype=np.float64, pool=None
+):
+    """
+    Set up a read of a sequence of pfb files, shared by ``read_pfb_sequence``
+    and ``read_pfb_sequence_async``. This reads the layout of the first file
+    and allocates the output.
+
+    :return:
+        A tuple of (output array, function reading the i'th file into the
+        output, number of files).
+    """
+    # Filter out unique files only
+    file_seq = sorted(list(set(file_seq)))
+    file_shape, read_into = _sequence_file_reader(
+        file_seq[0], keys, z_first, z_is, pool)
+
+    n_seq = len(file_seq)
+    if z_is == 'time':
+        # Allocate the concatenated output up front, each file is
+        # read straight into its block along the time axis
+        if z_first:
+            nz, ny, nx = file_shape
+            pfb_seq = np.empty((n_seq * nz, ny, nx), dtype=dtype)
+            file_slices = [pfb_seq[i*nz:(i+1)*nz] for i in range(n_seq)]
+        else:
+            nx, ny, nz = file_shape
+            pfb_seq = np.empty((nx, ny, n_seq * nz), dtype=dtype)
+            file_slices = [pfb_seq[..., i*nz:(i+1)*nz] for i in range(n_seq)]
+    else:
+        pfb_seq = np.empty((n_seq, *file_shape), dtype=dtype)
+        file_slices = list(pfb_seq)
+
+    def _read_file(i):
+        read_into(file_seq[i], file_slices[i])
+
+    return pfb_seq, _read_file, n_seq
+
+
+def _sequence_file_reader(
+    first_file, keys, z_first, z_is='z', pool=None
+) -> tuple:
+    """
+    Read the layout of the first file of a sequence, which is assumed
+    to be the same for every file, so that the other files only have
+    their headers read.
+
+    :param first_file:
+        The first file of the sequence.
+    :param keys:
+        A set of keys for indexing subarrays, in the format described in
+        ``read_pfb_sequence``.
+    :param z_first:
+        Whether the z dimension should be first.
+    :param z_is:
+        A descriptor of what the z axis represents, which is also the
+        name of its key. Can be one of 'z', 'time', 'variable'.
+    :param pool:
+        A ``ReaderPool`` to borrow readers from. Pooled readers keep their
+        own headers, and are opened with the layout of the first file.
+    :return:
+        A tuple of (shape of the data read from each file, function
+        reading the data from a file into a given output array).
+    """
+    with _open_reader(first_file, pool) as pfb_init:
+        base_layout = pfb_init.layout
+        base_header = pfb_init.header
+        base_sg_offsets = pfb_init.subgrid_offsets
+        base_sg_locations = pfb_init.subgrid_locations
+        base_sg_indices = pfb_init.subgrid_start_indices
+        base_sg_shapes = pfb_init.subgrid_shapes
+        base_sg_chunks = pfb_init.chunks
+        base_sg_coords = pfb_init.coords
+    (start_x, start_y, start_z), (nx, ny, nz) = _window_from_keys(
+        base_header, keys, z_is)
+    file_shape = (nz, ny, nx) if z_first else (nx, ny, nz)
+
+    def _open(file):
+        if pool is not None:
+            return pool.reader(file, layout=base_layout)
+        pfb = ParflowBinaryReader(
+            file, precompute_subgrid_info=False, header=base_header)
+        pfb.subgrid_offsets = base_sg_offsets
+        pfb.subgrid_locations = base_sg_locations
+        pfb.subgrid_start_indices = base_sg_indices
+        pfb.subgrid_shapes = base_sg_shapes
+        pfb.coords = base_sg_coords
+        pfb.chunks = base_sg_chunks
+        return pfb
+
+    def _read_into(file, out):
+        with _open(file) as pfb:
+            if not keys:
+                pfb.read_all_subgrids(mode='full', z_first=z_first, out=out)
+            else:
+                pfb.read_subarray(
+                    start_x, start_y, start_z, nx, ny, nz,
+                    z_first=z_first, out=out)
+
+    return file_shape, _read_into
+
+
+def _window_from_keys(header, keys, z_is='z') -> tuple:
+    """
+    Get the window of a pfb file selected by a set of keys, in the format
+    described in ``read_pfb_sequence``.
+
+    :return:
+        A tuple of ((start_x, start_y, start_z), (nx, ny, nz)).
+    """
+    if not keys:
+        return (0, 0, 0), (header['nx'], header['ny'], header['nz'])
+    start_x = keys.get('x', {}).get('start', None) or 0
+    start_y = keys.get('y', {}).get('start', None) or 0
+    start_z = keys.get(z_is, {}).get('start', None) or 0
+    stop_x =  keys.get('x', {}).get('stop', None) or header['nx']
+    stop_y =  keys.get('y', {}).get('stop', None) or header['ny']
+    stop_z =  keys.get(z_is, {}).get('stop', None) or header['nz']
+    nx = np.max([stop_x - start_x, 1])
+    ny = np.max([stop_y - start_y, 1])
+    nz = np.max([stop_z - start_z, 1])
+    return (start_x, start_y, start_z), (nx, ny, nz)
+
+
+def read_pfb_files(
+    files,
+    keys=None,
+    z_first: bool=True,
+    dates: Iterable=None,
+    variables: Iterable[str]=None,
+    batch_size: int=32,
+    workers: int=None,
+    use_processes: bool=False,
+    dtype=np.float64,
+    return_timings: bool=False,
+    **template_fields
+):
+    """
+    Read the same window from many pfb files, such as a region over some
+    months of a forcing archive. Files are split into batches of
+    ``batch_size`` which are read on a pool of ``workers`` threads, or
+    processes if ``use_processes`` is set. Within a batch, consecutive
+    files with the same grid share one subgrid layout, so every file only
+    costs its header and the reads of the subgrids overlapping the window.
+    Unlike ``read_pfb_sequence`` the order of the files is kept.
+
+        ::
+        data = read_pfb_files(
+            '/forcing/WY{wy}/NLDAS.{variable}.{day:03d}.pfb',
+            dates=pd.date_range('2002-10-01', periods=90),
+            variables=['Temp.daily.mean', 'APCP.daily.sum'],
+            keys={'x': {'start': 400, 'stop': 450},
+                  'y': {'start': 800, 'stop': 850}},
+            workers=12, wy=2003)
+
+    :param files:
+        The files to read. Either a sequence of file names, a dictionary
+        of sequences of file names keyed by variable, or a file name
+        template to fill in for each of ``dates`` with
+        ``pfb_files_from_template``.
+    :param keys:
+        A set of keys for the window to read. Optional, by default the
+        full files are read. See ``read_pfb_sequence`` for the format.
+    :param z_first:
+        Whether the z dimension should be first. If true returned arrays have
+        dimensions ('z', 'y', 'x') else ('x', 'y', 'z')
+    :param dates:
+        The dates to fill a file name template in with.
+    :param variables:
+        Names filled in as ``variable`` in a file name template, with one
+        array read for each. Optional.
+    :param batch_size:
+        The number of files read by each task.
+    :param workers:
+        The number of threads, or processes, reading batches concurrently.
+        Optional, by default batches are read serially.
+    :param use_processes:
+        Whether to read batches on a pool of processes rather than threads.
+        Each batch is then copied back to the calling process.
+    :param dtype:
+        The data type of the returned arrays, see ``read_pfb_sequence``.
+    :param return_timings:
+        Whether to also return the time spent reading each batch.
+    :param template_fields:
+        Extra fields to fill in a file name template with.
+
+    :return:
+        An nd array with dimensions (file, z, y, x) or (file, x, y, z), or a
+        dictionary of these keyed by variable if ``files`` is a dictionary or
+        ``variables`` are given. With ``return_timings`` this is returned in
+        a tuple with a list of dictionaries describing each batch, with the
+        'variable', 'start' (the index of the first file), 'n_files',
+        'nbytes' (of data returned) and 'seconds' taken.
+    """
+    if isinstance(files, (str, Path)):
+        if variables is None:
+            files = pfb_files_from_template(
+                str(files), dates, **template_fields)
+        else:
+            files = {v: pfb_files_from_template(
+                         str(files), dates, variable=v, **template_fields)
+                     for v in variables}
+    named = isinstance(files, Mapping)
+    file_groups = ({var: list(fs) for var, fs in files.items()} if named
+                   else {None: list(files)})
+
+    data, tasks = {}, []
+    for var, var_files in file_groups.items():
+        with ParflowBinaryReader(var_files[0]) as pfb:
+            layout = pfb.layout
+            _, window_shape = _window_from_keys(pfb.header, keys)
+        if z_first:
+            window_shape = window_shape[::-1]
+        data[var] = np.empty((len(var_files), *window_shape), dtype=dtype)
+        for start in range(0, len(var_files), batch_size):
+            tasks.append((var, start, var_files[start:start + batch_size],
+                          layout))
+
+    if use_processes and workers and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_read_pfb_batch, batch_files,
+                                   keys, z_first, dtype)
+                       for _, _, batch_files, _ in tasks]
+            seconds = []
+            for (var, start, batch_files, _), future in zip(tasks, futures):
+                batch_data, batch_seconds = future.result()
+                data[var][start:start + len(batch_files)] = batch_data
+                seconds.append(batch_seconds)
+    else:
+        def _read_task(task):
+            var, start, batch_files, layout = task
+            _, batch_seconds = _read_pfb_batch(
+                batch_files, keys, z_first, dtype,
+                out=data[var][start:start + len(batch_files)],
+                layout=layout)
+            return batch_seconds
+
+        seconds = _thread_map(_read_task, tasks, workers)
+
+    result = data if named else data[None]
+    if not return_timings:
+        return result
+    timings = [{'variable': var,
+                'start': start,
+                'n_files': len(batch_files),
+                'nbytes': data[var][start:start + len(batch_files)].nbytes,
+                'seconds': batch_seconds}
+               for (var, start, batch_files, _), batch_seconds
+               in zip(tasks, seconds)]
+    return result, timings
+
+
+def _read_pfb_batch(
+    files, keys, z_first, dtype, out=None, layout=None
+) -> tuple:
+    """
+    Read the window selected by ``keys`` from a batch of files for
+    ``read_pfb_files``. Each file reuses the layout of the one before it
+    if it fits. This is a module level function so that it can run on a
+    process pool, in which case ``out`` is allocated here.
+
+    :return:
+        A tuple of (data, seconds taken).
+    """
+    start_time = time.perf_counter()
+    for i, file in enumerate(files):
+        with ParflowBinaryReader(file, layout=layout) as pfb:
+            layout = pfb.layout
+            starts, shape = _window_from_keys(pfb.header, keys)
+            if out is None:
+                file_shape = shape[::-1] if z_first else shape
+                out = np.empty((len(files), *file_shape), dtype=dtype)
+            if not keys:
+                pfb.read_all_subgrids(mode='full', z_first=z_first, out=out[i])
+            else:
+                pfb.read_subarray(*starts, *shape, z_first=z_first, out=out[i])
+    return out, time.perf_counter() - start_time
+
+
+def pfb_files_from_template(template: str, dates: Iterable, **fields) -> List[str]:
+    """
+    Fill in a file name template for each of a range of dates. The
+    template is a format string which can use the fields ``date``, with
+    any ``strftime`` codes as its format (as in ``{date:%Y%m%d}``),
+    ``day``, the position of the date in ``dates`` counting from one,
+    and any of the extra ``fields``.
+
+        ::
+        files = pfb_files_from_template(
+            'WY{wy}/NLDAS.{variable}.{day:03d}.pfb',
+            pd.date_range('2002-10-01', periods=90),
+            wy=2003, variable='APCP.daily.sum')
+
+    :param template:
+        The file name template.
+    :param dates:
+        An iterable of dates, such as a ``pd.date_range``.
+    :param fields:
+        Extra fields to fill in the template with.
+
+    :return:
+        A list with a file name for each date.
+    """
+    return [template.format(date=date, day=i + 1, **fields)
+            for i, date in enumerate(dates)]
+
+
+# -----------------------------------------------------------------------------
+
+# Reductions supported by ``reduce_pfb_sequence``
+PFB_REDUCTIONS = ('sum', 'mean', 'min', 'max', 'count_nan')
+
+
+def reduce_pfb_sequence(
+    file_seq: Iterable[str],
+    ops: Iterable[str]=PFB_REDUCTIONS,
+    axis: str='time',
+    keys=None,
+    z_first: bool=True,
+    z_is: str='z',
+    workers: int=None
+) -> Mapping[str, np.ndarray]:
+    """
+    Compute reductions over a sequence of pfb files without reading the
+    whole sequence into memory. Files are read one at a time into a buffer
+    the size of a single file and folded into running accumulators, so the
+    memory used does not grow with the number of files. With ``workers``
+    each thread reduces a contiguous part of the sequence into its own
+    accumulators, and these are merged at the end.
+
+    NaN values are skipped. The 'sum' of cells which are always NaN is
+    zero, while their 'mean', 'min' and 'max' are NaN.
+
+        ::
+        stats = reduce_pfb_sequence(files, ops=['mean', 'max'], workers=4)
+        seasonal_mean = stats['mean']
+
+    :param file_seq:
+        An iterable sequence of file names to be read.
+    :param ops:
+        The reductions to compute. Any of 'sum', 'mean', 'min', 'max' and
+        'count_nan', which is the number of NaN values. Default is all.
+    :param axis:
+        The axis to reduce along. 'time' reduces over the files (and over
+        the z axis if ``z_is`` is 'time'), giving a value for every cell.
+        None reduces over everything, giving a single value.
+    :param keys:
+        A set of keys for indexing subarrays of the full pfb. Optional.
+        See ``read_pfb_sequence`` for the format.
+    :param z_first:
+        Whether the z dimension should be first. If true returned arrays have
+        dimensions ('z', 'y', 'x') else ('x', 'y', 'z')
+    :param z_is:
+        A descriptor of what the z axis represents. Can be one of
+        'z', 'time', 'variable'. Default is 'z'.
+    :param workers:
+        The number of threads used to read and reduce files concurrently.
+        Optional, by default files are reduced one after another.
+
+    :return:
+        A dictionary with the result of each of ``ops``.
+    """
+    ops = list(ops)
+    unknown = sorted(set(ops) - set(PFB_REDUCTIONS))
+    if unknown:
+        raise ValueError(f'Unknown reductions {unknown}, '
+                         f'must be in {PFB_REDUCTIONS}')
+    if axis not in ('time', None):
+        raise ValueError(f"Can only reduce along 'time' or None, not {axis}")
+    # Filter out unique files only, the same as read_pfb_sequence
+    file_seq = sorted(list(set(file_seq)))
+    file_shape, read_into = _sequence_file_reader(
+        file_seq[0], keys, z_first, z_is)
+    if z_is == 'time':
+        time_axis = 0 if z_first else 2
+        cell_shape = tuple(n for i, n in enumerate(file_shape)
+                           if i != time_axis)
+        n_steps = len(file_seq) * file_shape[time_axis]
+    else:
+        time_axis = None
+        cell_shape = file_shape
+        n_steps = len(file_seq)
+    need_min = 'min' in ops
+    need_max = 'max' in ops
+
+    def _reduce_files(file_indices):
+        buffer = np.empty(file_shape, dtype=np.float64)
+        total = np.zeros(cell_shape, dtype=np.float64)
+        lowest = np.full(cell_shape, np.nan)
+        highest = np.full(cell_shape, np.nan)
+        n_nan = np.zeros(cell_shape, dtype=np.int64)
+        for i in file_indices:
+            read_into(file_seq[i], buffer)
+            is_nan = np.isnan(buffer)
+            if time_axis is None:
+                n_nan += is_nan
+                np.add(total, buffer, out=total, where=~is_nan)
+                if need_min:
+                    np.fmin(lowest, buffer, out=lowest)
+                if need_max:
+                    np.fmax(highest, buffer, out=highest)
+            else:
+                n_nan += is_nan.sum(axis=time_axis)
+                total += np.nansum(buffer, axis=time_axis)
+                if need_min:
+                    np.fmin(lowest, np.fmin.reduce(buffer, axis=time_axis),
+                            out=lowest)
+                if need_max:
+                    np.fmax(highest, np.fmax.reduce(buffer, axis=time_axis),
+                            out=highest)
+        return total, lowest, highest, n_nan
+
+    n_batches = max(1, min(workers or 1, len(file_seq)))
+    partials = _thread_map(
+        _reduce_files, np.array_split(np.arange(len(file_seq)), n_batches),
+        workers)
+    total, lowest, highest, n_nan = partials[0]
+    for p_total, p_lowest, p_highest, p_n_nan in partials[1:]:
+        total += p_total
+        np.fmin(lowest, p_lowest, out=lowest)
+        np.fmax(highest, p_highest, out=highest)
+        n_nan += p_n_nan
+
+    n_values = n_steps
+    if axis is None:
+        n_values = n_steps * total.size
+        total = total.sum()
+        lowest = np.fmin.reduce(lowest, axis=None)
+        highest = np.fmax.reduce(highest, axis=None)
+        n_nan = n_nan.sum()
+    reduced = {}
+    for op in ops:
+        if op == 'sum':
+            reduced[op] = total
+        elif op == 'mean':
+            with np.errstate(invalid='ignore'):
+                reduced[op] = total / (n_values - n_nan)
+        elif op == 'min':
+            reduced[op] = lowest
+        elif op == 'max':
+            reduced[op] = highest
+        elif op == 'count_nan':
+            reduced[op] = n_nan
+    return reduced
+
+
+# -----------------------------------------------------------------------------
+
+def read_pfb_points(
+    files: Iterable[str],
+    points: Iterable[Iterable[int]],
+    workers: int=None,
+    pool: 'ReaderPool'=None
+) -> np.ndarray:
+    """
+    Read the values of individual cells from a sequence of pfb files.
+    Rather than reading whole subgrids this computes the exact byte offset
+    of every cell from the header and subgrid layout and reads only those
+    8 bytes, which makes it cheap to extract time series at a handful of
+    locations (for example stations or wells) from a long record. Just like
+    ``read_pfb_sequence`` the layout is read from the first file and is
+    assumed to be the same for every file.
+
+    :param files:
+        An iterable sequence of file names to be read. Unlike
+        ``read_pfb_sequence`` the order of the files is kept.
+    :param points:
+        An iterable of (x, y, z) cell indices to read.
+    :param workers:
+        The number of threads used to read files concurrently.
+        Optional, by default files are read one after another.
+    :param pool:
+        A ``ReaderPool`` to borrow the readers of the files from, see
+        ``read_pfb``. Optional, by default every file is opened.
+
+    :return:
+        An nd array with dimensions (n_files, n_points).
+    """
+    files = list(files)
+    points = np.array(points, dtype=np.int64).reshape(-1, 3)
+    with _open_reader(files[0], pool) as pfb:
+        if pfb.compressed:
+            return _read_compressed_pfb_points(files, points, pfb, workers)
+        offsets = pfb.cell_offsets(points[:, 0], points[:, 1], points[:, 2])
+        layout = pfb.layout
+
+    # Each distinct cell is read once, in file order
+    read_offsets, point_idx = np.unique(offsets, return_inverse=True)
+    data = np.empty((len(files), len(points)), dtype=np.float64)
+
+    def _read_file(i):
+        if pool is not None:
+            # Positional reads leave the pooled reader as it was
+            with pool.reader(files[i], layout=layout) as pfb:
+                io_start = time.perf_counter()
+                buf = _pread_cells(pfb.f.fileno(), read_offsets)
+                pfb.stats.add(
+                    read_calls=len(read_offsets),
+                    bytes_read=len(buf),
+                    io_seconds=time.perf_counter() - io_start,
+                    cells_read=len(read_offsets),
+                    cells_returned=len(points))
+            data[i] = np.frombuffer(buf, dtype='>f8')[point_idx]
+            return
+        start_time = time.perf_counter()
+        fd = os.open(files[i], os.O_RDONLY)
+        try:
+            io_start = time.perf_counter()
+            buf = _pread_cells(fd, read_offsets)
+        finally:
+            os.close(fd)
+        data[i] = np.frombuffer(buf, dtype='>f8')[point_idx]
+        # These reads bypass the ParflowBinaryReader
+        GLOBAL_READER_STATS.add(
+            files_opened=1,
+            open_seconds=io_start - start_time,
+            read_calls=len(read_offsets),
+            bytes_read=len(buf),
+            io_seconds=time.perf_counter() - io_start,
+            cells_read=len(read_offsets),
+            cells_returned=len(points))
+
+    _thread_map(_read_file, range(len(files)), workers)
+    return data
+
+
+def _pread_cells(fd, offsets) -> bytes:
+    """Read the 8 bytes of a cell at each of the byte offsets"""
+    return b''.join(os.pread(fd, 8, int(off)) for off in offsets)
+
+
+def _read_compressed_pfb_points(files, points, base_pfb, workers):
+    """
+    Backend for ``read_pfb_points`` on compressed pfb files, where only
+    the subgrids containing the points are read and decompressed.
+    """
+    subgrid_idx, local_idx = base_pfb.cell_locations(
+        points[:, 0], points[:, 1], points[:, 2])
+    data = np.empty((len(files), len(points)), dtype=np.float64)
+
+    def _read_file(i):
+        with ParflowBinaryReader(
+            files[i], precompute_subgrid_info=False, header=base_pfb.header
+        ) as pfb:
+            pfb.subgrid_shapes = base_pfb.subgrid_shapes
+            for sg_idx, sg_view in pfb._iter_subgrid_reads(
+                    np.unique(subgrid_idx)):
+                in_subgrid = subgrid_idx == sg_idx
+                data[i, in_subgrid] = (
+                    sg_view.ravel(order='F')[local_idx[in_subgrid]])
+
+    _thread_map(_read_file, range(len(files)), workers)
+    return data
+
+
+# -----------------------------------------------------------------------------
+
+# A pfb store holds sequences of pfb files rechunked along time, so that
+# a time series over a small window only touches a few chunks instead of
+# one file per timestep. Every variable is a directory of blosc2 chunks
+# with dimensions (time, z, y, x), named ``<t>.<z>.<y>.<x>`` after their
+# position in the chunk grid. The index file describes each variable.
+PFB_STORE_INDEX = 'pfbstore.json'
+PFB_STORE_VERSION = 1
+PFB_STORE_DIMS = ('time', 'z', 'y', 'x')
+
+
+def write_pfb_store(
+    source,
+    store_dir: str,
+    variables: Iterable[str]=None,
+    time_range: Iterable[int]=None,
+    name: str='parflow_variable',
+    time_block: int=24,
+    tile_size: Iterable[int]=(64, 64),
+    dtype=np.float64,
+    clevel: int=5,
+    workers: int=None
+) -> dict:
+    """
+    Convert sequences of pfb files, one (or a few) timesteps per file,
+    into a pfb store with chunks of ``time_block`` timesteps by
+    ``tile_size`` cells. The full z extent of a file is kept in every chunk.
+
+    Chunks are written as they are finished and chunks which already exist
+    are skipped, along with reading the files for any work unit (a block of
+    timesteps for one row of tiles) which is complete. An interrupted
+    conversion is therefore resumed by calling this again with the same
+    arguments.
+
+    Requires the ``blosc2`` package.
+
+        ::
+        write_pfb_store('conus1_nldas_daily_2003.pfmetadata', 'nldas_2003',
+                        variables=['APCP', 'Temp_mean'], workers=8)
+        ds = xr.open_dataset('nldas_2003', engine='parflow')
+
+    :param source:
+        Where to find the pfb files. This can be a pfmetadata file, in which
+        case every time varying pfb variable is converted, a file template
+        such as ``press.%05d.pfb`` which is filled in with each timestep in
+        ``time_range``, or a sequence of file names.
+    :param store_dir:
+        The directory to write the store to. It is created if needed.
+    :param variables:
+        The names of the variables to convert from a pfmetadata file.
+        Optional, by default all time varying variables are converted.
+    :param time_range:
+        The arguments to ``np.arange`` giving the timesteps to fill a file
+        template with. Only used, and required, for file templates.
+    :param name:
+        The name of the variable for file templates and sequences of files.
+    :param time_block:
+        The number of timesteps in each chunk.
+    :param tile_size:
+        The (y, x) number of cells in each chunk.
+    :param dtype:
+        The data type to store, for example ``np.float32`` to halve the size
+        of the store. Default is float64, which keeps the data exactly.
+    :param clevel:
+        The blosc2 compression level, from 0 to 9.
+    :param workers:
+        The number of threads used to convert work units concurrently.
+        Optional, by default work units are converted serially.
+
+    :return:
+        The index of the store.
+    """
+    _require_blosc2()
+    sources, coordinates = _pfb_store_sources(
+        source, variables, time_range, name)
+    index_file = os.path.join(store_dir, PFB_STORE_INDEX)
+    if os.path.exists(index_file):
+        with open(index_file, 'r') as f:
+            index = json.load(f)
+    else:
+        index = {'version': PFB_STORE_VERSION,
+                 'coordinates': {},
+                 'variables': {}}
+    index['coordinates'].update(coordinates)
+
+    ty, tx = tile_size
+    units = []
+    for var, (files, z_is) in sources.items():
+        with ParflowBinaryReader(files[0], precompute_subgrid_info=False) as pfb:
+            header = {k: pfb.header[k]
+                      for k in ('x', 'y', 'z', 'dx', 'dy', 'dz')}
+            nx, ny, nz = pfb.header['nx'], pfb.header['ny'], pfb.header['nz']
+        if z_is == 'time':
+            # Every file holds nz timesteps of a 2D field
+            shape = [len(files) * nz, 1, ny, nx]
+        else:
+            shape = [len(files), nz, ny, nx]
+        var_meta = {
+            'shape': shape,
+            'chunks': [min(time_block, shape[0]), shape[1],
+                       min(ty, ny), min(tx, nx)],
+            'dtype': np.dtype(dtype).str,
+            'header': header,
+            'z_is': z_is,
+            'files': list(files),
+        }
+        if index['variables'].get(var, var_meta) != var_meta:
+            raise ValueError(f'The store in {store_dir} already holds '
+                             f'{var} with different settings')
+        index['variables'][var] = var_meta
+        os.makedirs(os.path.join(store_dir, var), exist_ok=True)
+        n_chunks = _pfb_store_chunk_counts(var_meta)
+        units.extend((var, ti, yi)
+                     for ti in range(n_chunks[0])
+                     for yi in range(n_chunks[2]))
+
+    # The index is in place before any chunk, so a partial store
+    # can always be resumed
+    _write_json_atomic(index, index_file)
+
+    def _convert_unit(unit):
+        var, ti, yi = unit
+        var_meta = index['variables'][var]
+        files, z_is = sources[var]
+        nt, nz, ny, nx = var_meta['shape']
+        ct, _, cy, cx = var_meta['chunks']
+        n_chunks = _pfb_store_chunk_counts(var_meta)
+        missing = [(xi, _pfb_store_chunk_file(store_dir, var, (ti, 0, yi, xi)))
+                   for xi in range(n_chunks[3])]
+        missing = [(xi, f) for xi, f in missing if not os.path.exists(f)]
+        if not missing:
+            return
+        t0, t1 = ti * ct, min((ti + 1) * ct, nt)
+        keys = {'y': {'start': yi * cy, 'stop': min((yi + 1) * cy, ny)}}
+        # Chunks are positional along time, so the files are read in the
+        # order given (``read_pfb_sequence`` sorts and de-duplicates them)
+        if z_is == 'time':
+            n_per_file = _pfb_store_steps_per_file(var_meta)
+            f0 = t0 // n_per_file
+            f1 = -(-t1 // n_per_file)
+            block = read_pfb_files(files[f0:f1], keys=keys, dtype=dtype)
+            block = block.reshape(-1, *block.shape[2:])
+            block = block[t0 - f0 * n_per_file:t1 - f0 * n_per_file, None]
+        else:
+            block = read_pfb_files(files[t0:t1], keys=keys, dtype=dtype)
+        for xi, chunk_file in missing:
+            chunk = np.ascontiguousarray(block[..., xi * cx:(xi + 1) * cx])
+            compressed = blosc2.compress(
+                chunk,
+                typesize=chunk.itemsize,
+                clevel=clevel,
+                codec=blosc2.Codec.ZSTD,
+                filter=blosc2.Filter.BITSHUFFLE,
+            )
+            tmp_file = f'{chunk_file}.tmp'
+            with open(tmp_file, 'wb') as f:
+                f.write(compressed)
+            os.replace(tmp_file, chunk_file)
+
+    _thread_map(_convert_unit, units, workers)
+    return index
+
+
+def read_pfb_store(
+    store_dir: str,
+    variable: str,
+    keys=None,
+    workers: int=None
+) -> np.ndarray:
+    """
+    Read a variable from a pfb store written by ``write_pfb_store``.
+    Only the chunks overlapping the requested window are read.
+
+    :param store_dir:
+        The directory of the store.
+    :param variable:
+        The name of the variable to read.
+    :param keys:
+        A set of keys for indexing a window of the variable. Optional.
+        The format is the same as for ``read_pfb_sequence``, with an
+        additional 'time' key:
+
+            ::
+            {'time': {'start': start_t, 'stop': end_t},
+             'x': {'start': start_x, 'stop': end_x}}
+
+    :param workers:
+        The number of threads used to read chunks concurrently.
+        Optional, by default chunks are read serially.
+
+    :return:
+        An nd array with dimensions ('time', 'z', 'y', 'x').
+    """
+    _require_blosc2()
+    var_meta = read_pfb_store_index(store_dir)['variables'][variable]
+    shape, chunks = var_meta['shape'], var_meta['chunks']
+    dtype = np.dtype(var_meta['dtype'])
+    keys = keys or {}
+    bounds = []
+    for dim, n in zip(PFB_STORE_DIMS, shape):
+        start = keys.get(dim, {}).get('start', None) or 0
+        stop = keys.get(dim, {}).get('stop', None) or n
+        bounds.append((start, max(stop, start + 1)))
+    data = np.empty([stop - start for start, stop in bounds], dtype=dtype)
+    chunk_ids = list(itertools.product(*(
+        range(start // c, (stop - 1) // c + 1)
+        for (start, stop), c in zip(bounds, chunks))))
+
+    def _read_chunk(chunk_id):
+        lower = [i * c for i, c in zip(chunk_id, chunks)]
+        upper = [min(l + c, n) for l, c, n in zip(lower, chunks, shape)]
+        with open(_pfb_store_chunk_file(store_dir, variable, chunk_id),
+                  'rb') as f:
+            chunk = np.frombuffer(blosc2.decompress(f.read()), dtype=dtype)
+        chunk = chunk.reshape([u - l for l, u in zip(lower, upper)])
+        src, dst = [], []
+        for (start, stop), l, u in zip(bounds, lower, upper):
+            lo, hi = max(start, l), min(stop, u)
+            src.append(slice(lo - l, hi - l))
+            dst.append(slice(lo - start, hi - start))
+        data[tuple(dst)] = chunk[tuple(src)]
+
+    _thread_map(_read_chunk, chunk_ids, workers)
+    return data
+
+
+def read_pfb_store_index(store_dir: str) -> dict:
+    """
+    Read the index of a pfb store. The index is cached until the index
+    file changes, so the returned dictionary must not be modified.
+
+    :param store_dir:
+        The directory of the store.
+    :return:
+        A dictionary with the 'coordinates' and 'variables' of the store.
+    """
+    index_file = os.path.join(store_dir, PFB_STORE_INDEX)
+    return _cached_pfb_store_index(
+        index_file, os.stat(index_file).st_mtime_ns)
+
+
+def is_pfb_store(path) -> bool:
+    """Whether ``path`` is the directory of a pfb store"""
+    return (isinstance(path, (str, Path))
+            and os.path.isfile(os.path.join(path, PFB_STORE_INDEX)))
+
+
+@lru_cache(maxsize=32)
+def _cached_pfb_store_index(index_file, mtime_ns) -> dict:
+    """Backend for ``read_pfb_store_index``, keyed on the file mtime"""
+    with open(index_file, 'r') as f:
+        return json.load(f)
+
+
+def _pfb_store_sources(source, variables, time_range, name) -> tuple:
+    """
+    Find the files to convert for ``write_pfb_store``.
+
+    :return:
+        A tuple of ({variable: (files, z_is)}, time coordinates), where
+        z_is is 'time' when every file holds several timesteps.
+    """
+    if isinstance(source, (str, Path)) and str(source).endswith('.pfmetadata'):
+        with open(source, 'r') as f:
+            pf_meta = json.load(f)
+        base_dir = os.path.dirname(source)
+        sources = {}
+        for section in ('outputs', 'inputs'):
+            for var, var_meta in pf_meta.get(section, {}).items():
+                if variables is not None and var not in variables:
+                    continue
+                data = var_meta.get('data', [{}])[0]
+                if var_meta['type'] == 'pfb' and var_meta.get('time-varying'):
+                    files = [data['file-series'] % n
+                             for n in np.arange(*data['time-range'])]
+                    sources[var] = (files, 'z')
+                elif var_meta['type'] == 'pfb 2d timeseries':
+                    step = data['times-between'][-1]
+                    files = [data['file-series'] % (s, s + step - 1)
+                             for s in np.arange(*data['times-between'])]
+                    sources[var] = (files, 'time')
+        for var, (files, z_is) in sources.items():
+            # Same fallback as the xarray backend
+            if not os.path.exists(files[0]):
+                sources[var] = ([f'{base_dir}/{f}' for f in files], z_is)
+        coordinates = {k: v for k, v in pf_meta.get('coordinates', {}).items()
+                       if v.get('type') == 'time'}
+        return sources, coordinates
+    if isinstance(source, (str, Path)):
+        if time_range is None:
+            raise ValueError('A time_range is needed to fill in '
+                             f'the file template {source}')
+        files = [str(source) % n for n in np.arange(*time_range)]
+    else:
+        files = [str(f) for f in source]
+    return {name: (files, 'z')}, {}
+
+
+def _pfb_store_chunk_counts(var_meta) -> List[int]:
+    """The number of chunks along each dimension of a store variable"""
+    return [-(-n // c) for n, c in zip(var_meta['shape'], var_meta['chunks'])]
+
+
+def _pfb_store_steps_per_file(var_meta) -> int:
+    """The number of timesteps in each file of a store variable"""
+    return var_meta['shape'][0] // len(var_meta['files'])
+
+
+def _pfb_store_chunk_file(store_dir, variable, chunk_id) -> str:
+    """The path of the chunk at position ``chunk_id`` of a store variable"""
+    return os.path.join(
+        store_dir, variable, '.'.join(str(int(i)) for i in chunk_id))
+
+
+def _write_json_atomic(obj, file_name):
+    """Write ``obj`` as JSON by replacing ``file_name`` with a new file"""
+    tmp_file = f'{file_name}.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump(obj, f, indent=2)
+    os.replace(tmp_file, file_name)
+
+
+# -----------------------------------------------------------------------------
+
+class ReaderStats:
+    """
+    Counts the work done reading pfb files, to tell whether a slow read
+    was spent waiting on storage (``open_seconds``, ``header_seconds`` and
+    ``io_seconds``), reading more than needed (``cells_read`` compared to
+    ``cells_returned``, see ``read_amplification``) or decoding.
+
+    Every ``ParflowBinaryReader`` keeps its own ``stats``, which are added
+    to ``GLOBAL_READER_STATS`` when the reader is closed, or after every
+    use of a reader borrowed from a ``ReaderPool``.
+
+    Data read through the memory map of a file (full reads and single
+    subgrids) is counted in ``bytes_mapped`` rather than ``bytes_read``.
+    Those pages are read from storage as they are decoded, so that I/O
+    time is part of ``decode_seconds``. Byteswapping and placing data in
+    the output happen in the same copy, so they are timed together in
+    ``decode_seconds``, along with decompression for compressed files.
+    """
+
+    COUNTERS = (
+        'files_opened',
+        'read_calls',
+        'bytes_read',
+        'bytes_mapped',
+        'memmaps_created',
+        'subgrids_read',
+        'cells_read',
+        'cells_returned',
+    )
+    TIMERS = (
+        'open_seconds',
+        'header_seconds',
+        'io_seconds',
+        'decode_seconds',
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Set all counters and timers to zero"""
+        with self._lock:
+            for name in self.COUNTERS:
+                setattr(self, name, 0)
+            for name in self.TIMERS:
+                setattr(self, name, 0.0)
+
+    def add(self, **values):
+        """Add to some of the counters and timers, given by name"""
+        with self._lock:
+            for name, value in values.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def merge(self, other: 'ReaderStats'):
+        """Add all of the counters and timers of another ``ReaderStats``"""
+        self.add(**other.as_dict())
+
+    def as_dict(self) -> dict:
+        """The counters and timers as a dictionary, for example to export"""
+        with self._lock:
+            return {name: getattr(self, name)
+                    for name in self.COUNTERS + self.TIMERS}
+
+    @property
+    def read_amplification(self) -> float:
+        """The number of cells read for every cell returned"""
+        if not self.cells_returned:
+            return float('nan')
+        return self.cells_read / self.cells_returned
+
+    def __repr__(self):
+        values = ', '.join(f'{k}={v:.4g}' if isinstance(v, float) else f'{k}={v}'
+                           for k, v in self.as_dict().items())
+        return f'ReaderStats({values})'
+
+
+# The stats of every pfb reader in this process, added as readers close
+GLOBAL_READER_STATS = ReaderStats()
+
+_READER_STATS_HOOKS = []
+
+
+def add_reader_stats_hook(hook):
+    """
+    Register a function which is called as ``hook(filename, stats)`` with
+    the ``ReaderStats`` of every ``ParflowBinaryReader`` when it is closed
+    (or returned to a ``ReaderPool``), for example to export them from a
+    service. Errors raised by a hook are issued as warnings.
+
+    :param hook:
+        The function to call.
+    """
+    _READER_STATS_HOOKS.append(hook)
+
+
+def remove_reader_stats_hook(hook):
+    """
+    Unregister a function added with ``add_reader_stats_hook``.
+
+    :param hook:
+        The function to remove.
+    """
+    _READER_STATS_HOOKS.remove(hook)
+
+
+# -----------------------------------------------------------------------------
+
+# Interactive work reads small windows of the same files over and over,
+# and every read opening the file and reading its header (and subgrid
+# layout) again costs more than the read itself. A ``ReaderPool`` keeps
+# readers open between reads, up to a number of open files.
+READER_POOL_MAX_READERS = 128
+
+
+class ReaderPool:
+    """
+    A bounded pool of open ``ParflowBinaryReader`` objects, keyed by path,
+    which keeps their file descriptors, headers and subgrid layouts
+    between reads. Readers are lent out one caller at a time, since reads
+    move the file position, so threads reading the same file concurrently
+    each get their own reader::
+
+        with pool.reader(file) as pfb:
+            data = pfb.read_subarray(x, y, z, nx, ny, nz)
+
+    When more than ``max_readers`` readers are idle the least recently
+    used are closed. A reader is reopened if its file was replaced or
+    modified since it was opened. Readers are not shared with forked
+    processes, the pool of a child process starts out empty.
+    """
+
+    def __init__(self, max_readers: int=READER_POOL_MAX_READERS):
+        """
+        :param max_readers:
+            The maximum number of idle open readers, and so open files,
+            kept by the pool. 0 turns pooling off.
+        """
+        self.max_readers = max_readers
+        self._reset()
+
+    def _reset(self):
+        """
+        Forget all idle readers. The lock is created anew, since a forked
+        process may inherit the lock of its parent while it is held.
+        """
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._idle = OrderedDict()
+        self._n_idle = 0
 
-    :param z_first:
-        Whether the z dimension should be first. If true returned arrays have
-        dimensions ('z', 'y', 'x') else ('x', 'y', 'z')
-    :param z_is:
-        A descriptor of what the z axis represents. Can be one of
-        'z', 'time', 'variable'. Default is 'z'.
+    def _check_fork(self):
+        """
+        Start with an empty pool in a forked process, since its readers
+        share their file positions with the readers of the parent.
+        """
+        if self._pid != os.getpid():
+            inherited = [pfb for entries in self._idle.values()
+                         for _, pfb in entries]
+            self._reset()
+            # Closing the copies of the file descriptors in this process
+            # leaves the parent's open. This does not go through ``close``,
+            # the statistics of the readers belong to the parent, and the
+            # stats lock may have been held when the process was forked.
+            for pfb in inherited:
+                pfb._file_map = None
+                pfb.f.close()
+
+    def __len__(self):
+        """The number of idle readers in the pool"""
+        self._check_fork()
+        return self._n_idle
+
+    @contextmanager
+    def reader(self, file: str, **kwargs) -> 'ParflowBinaryReader':
+        """
+        Borrow an open reader of a file from the pool, opening a new one
+        if there is no idle reader of the file.
+
+        :param file:
+            The pfb file to read.
+        :param kwargs:
+            Arguments passed to ``ParflowBinaryReader`` when a reader has
+            to be opened, such as the ``layout`` shared by a sequence.
+        :returns:
+            A context manager giving the reader, which is returned to the
+            pool when the context exits.
+        """
+        self._check_fork()
+        key = os.path.abspath(file)
+        pfb = self._take(key)
+        if pfb is None:
+            pfb = ParflowBinaryReader(file, **kwargs)
+        try:
+            yield pfb
+        except BaseException:
+            pfb.close()
+            raise
+        self._give(key, pfb)
+
+    def _take(self, key) -> 'ParflowBinaryReader':
+        """Take an idle reader of a file, if it is still up to date"""
+        with self._lock:
+            readers = self._idle.get(key)
+            if not readers:
+                return None
+            signature, pfb = readers.pop()
+            self._n_idle -= 1
+            if not readers:
+                del self._idle[key]
+        try:
+            current = _file_signature(os.stat(key))
+        except OSError:
+            current = None
+        if current != signature:
+            pfb.close()
+            return None
+        return pfb
+
+    def _give(self, key, pfb: 'ParflowBinaryReader'):
+        """Return a borrowed reader, closing the least recently used"""
+        # Statistics are reported after every use, not when closing
+        pfb._report_stats()
+        pfb.stats.reset()
+        pfb._file_map = None
+        if self.max_readers <= 0:
+            pfb.close()
+            return
+        signature = _file_signature(os.fstat(pfb.f.fileno()))
+        evicted = []
+        with self._lock:
+            self._idle.setdefault(key, []).append((signature, pfb))
+            self._idle.move_to_end(key)
+            self._n_idle += 1
+            while self._n_idle > self.max_readers:
+                old_key, readers = next(iter(self._idle.items()))
+                evicted.append(readers.pop(0)[1])
+                self._n_idle -= 1
+                if not readers:
+                    del self._idle[old_key]
+        for old in evicted:
+            old.close()
+
+    def clear(self):
+        """Close all idle readers"""
+        self._check_fork()
+        with self._lock:
+            readers = [pfb for entries in self._idle.values()
+                       for _, pfb in entries]
+            self._idle.clear()
+            self._n_idle = 0
+        for pfb in readers:
+            pfb.close()
+
+
+def _file_signature(stat) -> tuple:
+    """What identifies a version of a file, from ``os.stat``"""
+    return (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def _open_reader(file: str, pool: ReaderPool=None, **kwargs):
+    """
+    Open a reader of a file, borrowing it from ``pool`` if one is given.
 
-    :return:
-        An nd array containing the data from the files.
+    :returns:
+        A context manager giving a ``ParflowBinaryReader``.
     """
-    # Filter out unique files only
-    file_seq = sorted(list(set(file_seq)))
-    with ParflowBinaryReader(file_seq[0]) as pfb_init:
-        base_header = pfb_init.header
-        base_sg_offsets = pfb_init.subgrid_offsets
-        base_sg_locations = pfb_init.subgrid_locations
-        base_sg_indices = pfb_init.subgrid_start_indices
-        base_sg_shapes = pfb_init.subgrid_shapes
-        base_sg_chunks = pfb_init.chunks
-        base_sg_coords = pfb_init.coords
-    if not keys:
-        nx, ny, nz = base_header['nx'], base_header['ny'], base_header['nz']
-    else:
-        start_x = keys.get('x', {}).get('start', None) or 0
-        start_y = keys.get('y', {}).get('start', None) or 0
-        start_z = keys.get(z_is, {}).get('start', None) or 0
-        stop_x =  keys.get('x', {}).get('stop', None) or base_header['nx']
-        stop_y =  keys.get('y', {}).get('stop', None) or base_header['ny']
-        stop_z =  keys.get(z_is, {}).get('stop', None) or base_header['nz']
-        nx = np.max([stop_x - start_x, 1])
-        ny = np.max([stop_y - start_y, 1])
-        nz = np.max([stop_z - start_z, 1])
+    if pool is None:
+        return ParflowBinaryReader(file, **kwargs)
+    return pool.reader(file, **kwargs)
 
-    n_seq = len(file_seq)
-    if z_first:
-        seq_size = (len(file_seq), nz, ny, nx)
-    else:
-        seq_size = (len(file_seq), nx, ny, nz)
-    pfb_seq = np.empty(seq_size, dtype=np.float64)
-    for i, f in enumerate(file_seq):
-        with ParflowBinaryReader(
-            f, precompute_subgrid_info=False, header=base_header
-        ) as pfb:
-            pfb.subgrid_offsets = base_sg_offsets
-            pfb.subgrid_locations = base_sg_locations
-            pfb.subgrid_start_indices = base_sg_indices
-            pfb.subgrid_shapes = base_sg_shapes
-            pfb.coords = base_sg_coords
-            pfb.chunks = base_sg_chunks
-            if not keys:
-                subseq_data = pfb.read_all_subgrids(mode='full', z_first=z_first)
-            else:
-                subseq_data = pfb.read_subarray(
-                        start_x, start_y, start_z, nx, ny, nz, z_first=z_first)
-            pfb_seq[i, :, : ,:] = subseq_data
-    if z_is == 'time':
-        if z_first:
-            pfb_seq = np.concatenate(pfb_seq, axis=0)
-        else:
-            pfb_seq = np.concatenate(pfb_seq, axis=-1)
-    return pfb_seq
+
+# The pool of readers shared by the reads of the xarray backend
+GLOBAL_READER_POOL = ReaderPool()
 
 
 # -----------------------------------------------------------------------------
@@ -359,6 +1972,11 @@ class ParflowBinaryReader:
     :param header:
         A dictionary representing the header of the pfb file. This is an optional
         input, if it is not given we will read it from the pfb file directly.
+    :param layout:
+        A subgrid layout, for example the ``layout`` of another file from the
+        same sequence. This is an optional input, it is used if it matches the
+        grid and number of subgrids in the header, otherwise the layout is
+        found as usual.
     """
 
     def __init__(
@@ -368,62 +1986,326 @@ class ParflowBinaryReader:
         p: int=None,
         q: int=None,
         r: int=None,
-        header: Mapping[str, Number]=None
+        header: Mapping[str, Number]=None,
+        layout: 'SubgridLayout'=None
     ):
+        self.stats = ReaderStats()
+        start_time = time.perf_counter()
         self.filename = file
         self.f = open(self.filename, 'rb')
+        header_time = time.perf_counter()
+        self.stats.add(files_opened=1, open_seconds=header_time - start_time)
+        self._file_map = None
+        self.chunk_offsets = None
         if not header:
             self.header = self.read_header()
         else:
             self.header = header
+            if self.compressed:
+                # The index of compressed subgrids differs between files
+                self.chunk_offsets = self.read_chunk_offsets()
 
         if np.all([p, q, r]):
             self.header['p'] = p
             self.header['q'] = q
             self.header['r'] = r
 
+        self._layout = None
+        if layout is not None and self._layout_matches_header(layout):
+            self._layout = layout
+            self.header['p'] = len(layout.chunks['x'])
+            self.header['q'] = len(layout.chunks['y'])
+            self.header['r'] = len(layout.chunks['z'])
         if not ('p' in self.header
             and 'q' in self.header
             and 'r' in self.header):
-            # If p, q, and r aren't given we can precompute them
-            # NOTE: This is a bit of a fallback and may not always work
-            eps = 1 - 1e-6
-            first_sg_head = self.read_subgrid_header()
-            self.header['p'] = int((self.header['nx'] / first_sg_head['nx']) + eps)
-            self.header['q'] = int((self.header['ny'] / first_sg_head['ny']) + eps)
-            self.header['r'] = int((self.header['nz'] / first_sg_head['nz']) + eps)
+            # If p, q, and r aren't given they are found with the layout
+            self._layout = self.find_subgrid_layout()
 
         if precompute_subgrid_info:
             self.compute_subgrid_info()
+        self.stats.add(header_seconds=time.perf_counter() - header_time)
+
+    @property
+    def layout(self) -> 'SubgridLayout':
+        """The subgrid layout of the file, or None if it is not known yet"""
+        return self._layout
+
+    @property
+    def compressed(self) -> bool:
+        """Whether this is a compressed pfb file, see ``write_compressed_pfb``"""
+        return bool(self.header.get('compressed', False))
 
     def close(self):
+        if self.f.closed:
+            return
+        self._file_map = None
         self.f.close()
+        self._report_stats()
+
+    def _report_stats(self):
+        """
+        Add the stats to the global stats, and pass them to the hooks.
+        Errors raised by hooks are turned into warnings, so that they do
+        not stop readers from being closed or returned to a pool.
+        """
+        GLOBAL_READER_STATS.merge(self.stats)
+        for hook in list(_READER_STATS_HOOKS):
+            try:
+                hook(self.filename, self.stats)
+            except Exception as e:
+                warnings.warn(f'Reader stats hook {hook!r} failed for '
+                              f'{self.filename}: {e!r}', RuntimeWarning)
 
     def __enter__(self):
         return self
 
     def __exit__(self, type, value, traceback):
-        self.f.close()
+        self.close()
 
     def compute_subgrid_info(self):
-        """ Computes the subgrid information """
+        """
+        Computes the subgrid information. Files sharing a grid and
+        topology share one read-only layout, see ``get_subgrid_layout``
+        and ``find_subgrid_layout``.
+        """
+        if self._layout is None:
+            self._layout = self.find_subgrid_layout()
+        layout = self._layout
+        self.subgrid_offsets = layout.offsets
+        self.subgrid_locations = layout.locations
+        self.subgrid_start_indices = layout.start_indices
+        self.subgrid_shapes = layout.shapes
+        self.chunks = layout.chunks
+        self.coords = layout.coords
+
+    def find_subgrid_layout(self) -> 'SubgridLayout':
+        """
+        Find the subgrid layout of the file, and add the subgrid topology
+        (p, q, r) to the header if it was not known. The layout comes from,
+        in order of preference:
+
+            1. A sidecar index, see ``write_pfb_index``.
+            2. The ``.dist`` file if there is one, if its offsets are those
+               of the known topology, or of one of the topologies matching
+               the number of subgrids and the shape of the first subgrid,
+               or of subgrids which are not sized like ParFlow sizes them,
+               and the subgrid headers at the offsets match.
+            3. The known topology, or one of the topologies matching the
+               number of subgrids and the shape of the first subgrid,
+               checked against a few subgrid headers.
+            4. The headers of all subgrids, for files whose subgrids are
+               not sized like ParFlow sizes them.
+
+        Sidecar files which do not match the file, such as those left by
+        an earlier file of the same name, are ignored.
+
+        :returns:
+            A ``SubgridLayout``.
+        """
+        nx, ny, nz = self.header['nx'], self.header['ny'], self.header['nz']
+        has_topology = all(k in self.header for k in ('p', 'q', 'r'))
+        if self.compressed:
+            return get_subgrid_layout(
+                nx, ny, nz, self.header['p'], self.header['q'], self.header['r'])
+        layout = self._read_pfb_index()
+        if layout is None:
+            if has_topology:
+                topologies = [(self.header['p'],
+                               self.header['q'],
+                               self.header['r'])]
+            else:
+                topologies = self._candidate_topologies()
+            candidates = [get_subgrid_layout(nx, ny, nz, p, q, r)
+                          for p, q, r in topologies]
+            positions = self._read_dist_positions()
+            if positions is not None:
+                layout = self._layout_from_dist(positions, candidates)
+            if layout is None:
+                for candidate in candidates:
+                    if self._check_subgrid_headers(candidate):
+                        layout = candidate
+                        break
+                else:
+                    layout = self._layout_from_subgrid_headers()
+        self.header['p'] = len(layout.chunks['x'])
+        self.header['q'] = len(layout.chunks['y'])
+        self.header['r'] = len(layout.chunks['z'])
+        return layout
+
+    def _layout_from_dist(
+            self, positions: np.ndarray, candidates: List['SubgridLayout']
+    ) -> 'SubgridLayout':
+        """
+        Get the layout from the subgrid header ``positions`` of the
+        ``.dist`` file, or return None if they do not match the file.
+
+        :param positions:
+            The positions from ``_read_dist_positions``.
+        :param candidates:
+            The layouts of the known or candidate topologies.
+        """
+        for candidate in candidates:
+            if np.array_equal(candidate.offsets - 36, positions):
+                if self._check_subgrid_headers(candidate):
+                    return candidate
+                return None
         try:
-            sg_offs, sg_locs, sg_starts, sg_shapes = precalculate_subgrid_info(
-                self.header['nx'],
-                self.header['ny'],
-                self.header['nz'],
-                self.header['p'],
-                self.header['q'],
-                self.header['r']
-            )
-        except:
-            raise ValueError(self.header)
-        self.subgrid_offsets = np.array(sg_offs)
-        self.subgrid_locations = np.array(sg_locs)
-        self.subgrid_start_indices = np.array(sg_starts)
-        self.subgrid_shapes = np.array(sg_shapes)
-        self.chunks = self._compute_chunks()
-        self.coords = self._compute_coords()
+            layout = self._layout_from_subgrid_headers(positions)
+        except ValueError:
+            return None
+        topology = {'p': 'x', 'q': 'y', 'r': 'z'}
+        if any(len(layout.chunks[c]) != self.header[k]
+               for k, c in topology.items() if k in self.header):
+            return None
+        return layout
+
+    def _layout_matches_header(self, layout: 'SubgridLayout') -> bool:
+        """Whether a layout fits the grid and subgrids in the header"""
+        if len(layout.offsets) != self.header['n_subgrids']:
+            return False
+        for c in 'xyz':
+            if sum(layout.chunks[c]) != self.header[f'n{c}']:
+                return False
+        topology = {'p': 'x', 'q': 'y', 'r': 'z'}
+        return all(len(layout.chunks[c]) == self.header[k]
+                   for k, c in topology.items() if k in self.header)
+
+    def _file_size(self) -> int:
+        """The size of the file in bytes"""
+        return os.fstat(self.f.fileno()).st_size
+
+    def _read_pfb_index(self) -> 'SubgridLayout':
+        """
+        Read the layout from the sidecar index of the file, or return None
+        if there is no index or it does not match the file.
+        """
+        if not _has_sidecar(self.filename, PFB_INDEX_SUFFIX):
+            return None
+        try:
+            with open(f'{self.filename}{PFB_INDEX_SUFFIX}', 'rb') as f:
+                buf = f.read()
+        except OSError:
+            return None
+        n = self.header['n_subgrids']
+        if buf[:4] != PFB_INDEX_MAGIC or len(buf) != 28 + 32 * n:
+            return None
+        n_subgrids, p, q, r, file_size = struct.unpack('>iiiiq', buf[4:28])
+        if n_subgrids != n or file_size != self._file_size():
+            return None
+        offsets = np.frombuffer(buf, dtype='>i8', count=n, offset=28)
+        start_indices = np.frombuffer(
+            buf, dtype='>i4', count=3 * n, offset=28 + 8 * n)
+        shapes = np.frombuffer(
+            buf, dtype='>i4', count=3 * n, offset=28 + 20 * n)
+        try:
+            layout = subgrid_layout_from_arrays(offsets, start_indices, shapes)
+        except ValueError:
+            return None
+        data_ends = layout.offsets + 8 * np.prod(layout.shapes, axis=1)
+        if (np.any(data_ends > file_size)
+                or (p, q, r) != tuple(len(layout.chunks[c]) for c in 'xyz')):
+            return None
+        return layout
+
+    def _read_dist_positions(self) -> np.ndarray:
+        """
+        Read the byte positions of the subgrid headers from the ``.dist``
+        file, or return None if there is no such file or it does not
+        match the file.
+        """
+        if not _has_sidecar(self.filename, '.dist'):
+            return None
+        try:
+            with open(f'{self.filename}.dist', 'r') as f:
+                positions = np.array(f.read().split(), dtype=np.int64)
+        except (OSError, ValueError):
+            return None
+        if len(positions) != self.header['n_subgrids'] or not len(positions):
+            return None
+        # The first entry is where the first writer starts, which
+        # is the file header rather than the first subgrid header
+        positions[0] = 64
+        if (np.any(np.diff(positions) < 36)
+                or positions[-1] + 36 > self._file_size()):
+            return None
+        return positions
+
+    def _candidate_topologies(self) -> List[tuple]:
+        """
+        All subgrid topologies (p, q, r) with the number of subgrids in the
+        header where ParFlow would give the first subgrid its actual shape.
+        """
+        n_subgrids = self.header['n_subgrids']
+        if not n_subgrids:
+            return []
+        first_sg_head = self.read_subgrid_header()
+        divisors = [d for d in range(1, n_subgrids + 1)
+                    if n_subgrids % d == 0]
+        axis_candidates = [
+            [d for d in divisors if d <= self.header[n]
+             and -(-self.header[n] // d) == first_sg_head[n]]
+            for n in ('nx', 'ny', 'nz')
+        ]
+        return [(p, q, r)
+                for p, q, r in itertools.product(*axis_candidates)
+                if p * q * r == n_subgrids]
+
+    def _check_subgrid_headers(self, layout: 'SubgridLayout') -> bool:
+        """
+        Whether the headers of the last subgrid along each axis of the
+        subgrid grid match a candidate layout.
+        """
+        p, q = len(layout.chunks['x']), len(layout.chunks['y'])
+        check_idx = sorted({p - 1, p * q - 1, len(layout.offsets) - 1})
+        positions = layout.offsets[check_idx] - 36
+        if np.any(positions + 36 > self._file_size()):
+            return False
+        headers = self._subgrid_headers_at(positions)
+        expected = np.hstack([layout.start_indices[check_idx],
+                              layout.shapes[check_idx]])
+        return np.array_equal(headers[:, :6], expected)
+
+    def _layout_from_subgrid_headers(
+            self, positions: np.ndarray=None
+    ) -> 'SubgridLayout':
+        """
+        Build the layout from the subgrid headers at ``positions``. If the
+        positions are not known each subgrid header is read in turn, since
+        it gives the size, and so the position of the next subgrid.
+        """
+        n_subgrids = self.header['n_subgrids']
+        if positions is None:
+            positions = np.empty(n_subgrids, dtype=np.int64)
+            headers = np.empty((n_subgrids, 9), dtype=np.int64)
+            position = 64
+            for i in range(n_subgrids):
+                positions[i] = position
+                headers[i] = self._subgrid_headers_at([position])[0]
+                position += 36 + 8 * int(np.prod(headers[i, 3:6]))
+        else:
+            headers = self._subgrid_headers_at(positions)
+        offsets = positions + 36
+        data_ends = offsets + 8 * np.prod(headers[:, 3:6], axis=1)
+        # Subgrids follow each other, so that positions which were not
+        # found from the headers can be checked against them
+        if (np.any(data_ends > self._file_size())
+                or np.any(data_ends[:-1] != positions[1:])):
+            raise ValueError(f'Subgrid headers of {self.filename} '
+                             'do not match the file size')
+        return subgrid_layout_from_arrays(
+            offsets, headers[:, 0:3], headers[:, 3:6])
+
+    def _subgrid_headers_at(self, positions) -> np.ndarray:
+        """
+        Read the subgrid headers at the byte ``positions`` into an array
+        of shape (n, 9) holding ix, iy, iz, nx, ny, nz, rx, ry, rz.
+        """
+        fd = self.f.fileno()
+        buf = b''.join(os.pread(fd, 36, int(p)) for p in positions)
+        if len(buf) != 36 * len(positions):
+            raise ValueError(f'Truncated subgrid header in {self.filename}')
+        return np.frombuffer(buf, dtype='>i4').reshape(-1, 9).astype(np.int64)
 
     def _compute_chunks(self) -> Mapping[str, tuple]:
         """
@@ -438,10 +2320,7 @@ class ParflowBinaryReader:
              'z': tuple_with_len_r}
         """
         p, q, r = self.header['p'], self.header['q'], self.header['r'],
-        x_chunks = tuple(self.subgrid_shapes[:,0][0:p].flatten())
-        y_chunks = tuple(self.subgrid_shapes[:,1][0:p*q:p].flatten())
-        z_chunks = tuple(self.subgrid_shapes[:,2][0:p*q*r:p*q].flatten())
-        return {'x': x_chunks, 'y': y_chunks, 'z': z_chunks}
+        return compute_chunks(self.subgrid_shapes, p, q, r)
 
     def _compute_coords(self) -> Mapping[str, Iterable[Iterable[int]]]:
         """
@@ -461,30 +2340,94 @@ class ParflowBinaryReader:
                    (n1+1, n1+2, ... n1+n2),
                     ... for ni in self.chunks['z']],
         """
-        coords = {'x': [], 'y': [], 'z': []}
-        for c in ['x', 'y', 'z']:
-            chunk_start = 0
-            for chunk in self.chunks[c]:
-                coords[c].append(np.arange(chunk_start, chunk_start + chunk))
-                chunk_start += chunk
-        return coords
+        return compute_coords(self.chunks)
 
     def read_header(self):
-        """Reads the header"""
+        """
+        Reads the header. For compressed pfb files this also reads the
+        subgrid topology and the index of compressed subgrids.
+        """
         self.f.seek(0)
+        buf = self.f.read(80)
+        compressed = buf[:4] == COMPRESSED_PFB_MAGIC
+        if compressed:
+            buf = buf[4:]
         header = {}
-        header['x'] = struct.unpack('>d', self.f.read(8))[0]
-        header['y'] = struct.unpack('>d', self.f.read(8))[0]
-        header['z'] = struct.unpack('>d', self.f.read(8))[0]
-        header['nx'] = struct.unpack('>i', self.f.read(4))[0]
-        header['ny'] = struct.unpack('>i', self.f.read(4))[0]
-        header['nz'] = struct.unpack('>i', self.f.read(4))[0]
-        header['dx'] = struct.unpack('>d', self.f.read(8))[0]
-        header['dy'] = struct.unpack('>d', self.f.read(8))[0]
-        header['dz'] = struct.unpack('>d', self.f.read(8))[0]
-        header['n_subgrids'] = struct.unpack('>i', self.f.read(4))[0]
+        (header['x'], header['y'], header['z'],
+         header['nx'], header['ny'], header['nz'],
+         header['dx'], header['dy'], header['dz'],
+         header['n_subgrids']) = struct.unpack('>dddiiidddi', buf[:64])
+        if compressed:
+            header['p'], header['q'], header['r'] = struct.unpack(
+                '>iii', buf[64:76])
+            header['compressed'] = True
+            self.header = header
+            self.chunk_offsets = self.read_chunk_offsets()
         return header
 
+    def read_chunk_offsets(self) -> np.ndarray:
+        """
+        Reads the index of a compressed pfb file, which holds the byte
+        offset of each compressed subgrid followed by the end of the file.
+        """
+        n_offsets = self.header['n_subgrids'] + 1
+        self.f.seek(len(COMPRESSED_PFB_MAGIC) + 76)
+        buf = self.f.read(8 * n_offsets)
+        if len(buf) != 8 * n_offsets:
+            raise ValueError(f'Truncated compressed pfb file {self.filename}')
+        return np.frombuffer(buf, dtype='>u8').astype(np.int64)
+
+    def cell_offsets(self, x, y, z) -> np.ndarray:
+        """
+        Compute the byte offsets of cells in the file from the subgrid
+        layout, without reading any subgrid data. This is not possible
+        for compressed pfb files.
+
+        :param x:
+            An array of cell indices along the x dimension.
+        :param y:
+            An array of cell indices along the y dimension.
+        :param z:
+            An array of cell indices along the z dimension.
+        :returns:
+            An array with the byte offset of each cell.
+        """
+        if self.compressed:
+            raise ValueError(f'Cells of compressed pfb file {self.filename} '
+                             'do not have byte offsets')
+        subgrid_idx, local_idx = self.cell_locations(x, y, z)
+        return self.subgrid_offsets[subgrid_idx] + 8 * local_idx
+
+    def cell_locations(self, x, y, z) -> tuple:
+        """
+        Find the subgrids containing cells and the position of each cell
+        within the data of its subgrid.
+
+        :param x:
+            An array of cell indices along the x dimension.
+        :param y:
+            An array of cell indices along the y dimension.
+        :param z:
+            An array of cell indices along the z dimension.
+        :returns:
+            A tuple of arrays (subgrid index, flat index within subgrid).
+        """
+        x, y, z = (np.asarray(c, dtype=np.int64) for c in (x, y, z))
+        for c, n in zip((x, y, z), ('nx', 'ny', 'nz')):
+            if np.any((c < 0) | (c >= self.header[n])):
+                raise ValueError(f'Cell indices out of bounds for {n}='
+                                 f'{self.header[n]} in {self.filename}')
+        p, q = self.header['p'], self.header['q']
+        sg_p = _chunk_index_of_cells(self.chunks['x'], x)
+        sg_q = _chunk_index_of_cells(self.chunks['y'], y)
+        sg_r = _chunk_index_of_cells(self.chunks['z'], z)
+        subgrid_idx = sg_p + (p * sg_q) + (p * q * sg_r)
+        ix, iy, iz = self.subgrid_start_indices[subgrid_idx].T
+        sg_nx, sg_ny, _ = self.subgrid_shapes[subgrid_idx].T
+        # Subgrid data is stored in Fortran order
+        local_idx = (x - ix) + sg_nx * ((y - iy) + sg_ny * (z - iz))
+        return subgrid_idx, local_idx
+
     def read_subgrid_header(self, skip_bytes: int=64):
         """Reads a subgrid header at the position ``skip_bytes``"""
         self.f.seek(skip_bytes)
@@ -517,7 +2460,10 @@ class ParflowBinaryReader:
             nx: int=1,
             ny: int=1,
             nz: int=None,
-            z_first: bool=True
+            z_first: bool=True,
+            out: np.ndarray=None,
+            dtype=np.float64,
+            step: Iterable[int]=None
     ) -> np.ndarray:
         """
         Read a subsection of the full pfb file. For an example of what happens
@@ -557,26 +2503,22 @@ class ParflowBinaryReader:
         :param z_first:
             Whether the z dimension should be first. If true returned arrays have
             dimensions ('z', 'y', 'x') else ('x', 'y', 'z')
+        :param out:
+            An array (or view) to read the data into. This is optional, and if
+            not provided a new array is allocated. It must have the shape of
+            the returned data.
+        :param dtype:
+            The data type of the returned array, if ``out`` is not given.
+            Values are converted while they are byteswapped.
+        :param step:
+            A (step_z, step_y, step_x) tuple to only return every step'th
+            cell of the window along each axis, starting from its first
+            cell. Only the rows along x which hold returned cells are read.
+            This is optional, and if not provided every cell is returned.
 
         :returns:
             A nd array with shape (nx, ny, nz).
         """
-        def _get_final_clip(start, end, coords):
-            """ Helper to clean up code at the end of this """
-            x0 = np.flatnonzero(start == coords)
-            x0 = 0 if not x0 else x0[0]
-            x1 = np.flatnonzero(end == coords)
-            x1 = None if x1 is None or len(x1) == 0 else x1[0]
-            return slice(x0, x1)
-
-        def _get_needed_subgrids(start, end, coords):
-            """ Helper function to clean up subgrid selection """
-            for s, c in enumerate(coords):
-                if start in c: break
-            for e, c in enumerate(coords):
-                if end in c: break
-            return np.arange(s, e+1)
-
         if not start_x:
             start_x = 0
         if not start_y:
@@ -590,51 +2532,252 @@ class ParflowBinaryReader:
         if not nz:
             nz = self.header['nz']
 
-        end_x = start_x + nx
-        end_y = start_y + ny
-        end_z = start_z + nz
-        p, q, r = self.header['p'], self.header['q'], self.header['r']
-        # Convert to numpy array for simpler indexing
-        x_coords = np.array(self.coords['x'], dtype=object)
-        y_coords = np.array(self.coords['y'], dtype=object)
-        z_coords = np.array(self.coords['z'], dtype=object)
-
-        # Determine which subgrids we need to read
-        p_subgrids = _get_needed_subgrids(start_x, end_x, x_coords)
-        q_subgrids = _get_needed_subgrids(start_y, end_y, y_coords)
-        r_subgrids = _get_needed_subgrids(start_z, end_z, z_coords)
-
-        # Determine the coordinates of these subgrids
-        x_sg_coords = np.unique(np.hstack(x_coords[p_subgrids]))
-        y_sg_coords = np.unique(np.hstack(y_coords[q_subgrids]))
-        z_sg_coords = np.unique(np.hstack(z_coords[r_subgrids]))
-        # Min values will be used to align in the bounding data
-        x_min = np.min(x_sg_coords)
-        y_min = np.min(y_sg_coords)
-        z_min = np.min(z_sg_coords)
-        # Make an array which can fit all of the subgrids
-        full_size = (len(x_sg_coords), len(y_sg_coords), len(z_sg_coords))
-        bounding_data = np.empty(full_size, dtype=np.float64)
+        end_x = min(start_x + nx, self.header['nx'])
+        end_y = min(start_y + ny, self.header['ny'])
+        end_z = min(start_z + nz, self.header['nz'])
+        p, q = self.header['p'], self.header['q']
+        if step is not None and tuple(step) != (1, 1, 1):
+            return self._read_strided(
+                (start_x, start_y, start_z), (end_x, end_y, end_z),
+                step, z_first, out, dtype)
+
+        # Determine which subgrids we need to read directly from the
+        # subgrid sizes rather than searching the subgrid coordinates
+        p_first, p_last = _chunk_index_of_cells(
+            self.chunks['x'], [start_x, end_x - 1])
+        q_first, q_last = _chunk_index_of_cells(
+            self.chunks['y'], [start_y, end_y - 1])
+        r_first, r_last = _chunk_index_of_cells(
+            self.chunks['z'], [start_z, end_z - 1])
+        p_subgrids = range(p_first, p_last + 1)
+        q_subgrids = range(q_first, q_last + 1)
+        r_subgrids = range(r_first, r_last + 1)
+
+        if z_first:
+            out_shape = (end_z - start_z, end_y - start_y, end_x - start_x)
+        else:
+            out_shape = (end_x - start_x, end_y - start_y, end_z - start_z)
+        ret_data = _empty_or_out(out_shape, out, dtype)
         subgrid_iter = itertools.product(p_subgrids, q_subgrids, r_subgrids)
-        for (xsg, ysg, zsg) in subgrid_iter:
-            subgrid_idx = xsg + (p * ysg) + (p * q * zsg)
-            # Set up the indices to insert subgrid data into the bounding data
-            x0, y0, z0 = self.subgrid_start_indices[subgrid_idx]
-            x0, y0, z0 = x0 - x_min, y0 - y_min, z0 - z_min
-            dx, dy, dz = self.subgrid_shapes[subgrid_idx]
-            x1, y1, z1 = x0 + dx, y0 + dy, z0+ dz
-            bounding_data[x0:x1, y0:y1, z0:z1] = self.iloc_subgrid(subgrid_idx)
+        needed_subgrids = [xsg + (p * ysg) + (p * q * zsg)
+                           for (xsg, ysg, zsg) in subgrid_iter]
+        decode_seconds = 0.0
+        if self._use_decode_kernel(len(needed_subgrids)):
+            for buf, subgrids, buf_offsets in self._iter_read_ranges(
+                    needed_subgrids):
+                decode_start = time.perf_counter()
+                _decode_subgrids_kernel(
+                    buf, buf_offsets,
+                    self.subgrid_start_indices[subgrids],
+                    self.subgrid_shapes[subgrids],
+                    start_x, start_y, start_z, end_x, end_y, end_z,
+                    ret_data, z_first)
+                decode_seconds += time.perf_counter() - decode_start
+        else:
+            for subgrid_idx, sg_view in self._iter_subgrid_reads(needed_subgrids):
+                decode_start = time.perf_counter()
+                x0, y0, z0 = self.subgrid_start_indices[subgrid_idx]
+                dx, dy, dz = self.subgrid_shapes[subgrid_idx]
+                # Intersect the subgrid with the requested window
+                ix0, ix1 = max(x0, start_x), min(x0 + dx, end_x)
+                iy0, iy1 = max(y0, start_y), min(y0 + dy, end_y)
+                iz0, iz1 = max(z0, start_z), min(z0 + dz, end_z)
+                sg_slices = (slice(ix0 - x0, ix1 - x0),
+                             slice(iy0 - y0, iy1 - y0),
+                             slice(iz0 - z0, iz1 - z0))
+                out_slices = (slice(ix0 - start_x, ix1 - start_x),
+                              slice(iy0 - start_y, iy1 - start_y),
+                              slice(iz0 - start_z, iz1 - start_z))
+                # Only the intersecting part of the subgrid is decoded,
+                # straight from the read buffer into the output array
+                sg_data = sg_view[sg_slices]
+                if z_first:
+                    ret_data[out_slices[::-1]] = sg_data.T
+                else:
+                    ret_data[out_slices] = sg_data
+                decode_seconds += time.perf_counter() - decode_start
+        self.stats.add(cells_returned=ret_data.size,
+                       decode_seconds=decode_seconds)
+        return ret_data
 
-        # Now clip out the exact part from the bounding box
-        clip_x = _get_final_clip(start_x, end_x, x_sg_coords)
-        clip_y = _get_final_clip(start_y, end_y, y_sg_coords)
-        clip_z = _get_final_clip(start_z, end_z, z_sg_coords)
+    def _read_strided(self, starts, ends, step, z_first, out, dtype):
+        """
+        Backend for ``read_subarray`` with a ``step``. Rows along x are
+        contiguous in the file, so each row of a subgrid holding selected
+        cells is read with its own ``pread`` and the other rows are
+        skipped. Compressed subgrids can only be read whole, and when
+        every row is needed it is as cheap to read the whole window, so
+        in those cases the window is read and then subsampled.
+        """
+        step_z, step_y, step_x = (int(s) for s in step)
+        if min(step_x, step_y, step_z) < 1:
+            raise ValueError(f'The step must be at least 1, not {tuple(step)}')
+        start_x, start_y, start_z = starts
+        end_x, end_y, end_z = ends
+        xs = np.arange(start_x, end_x, step_x)
+        ys = np.arange(start_y, end_y, step_y)
+        zs = np.arange(start_z, end_z, step_z)
         if z_first:
-            ret_data = bounding_data[clip_x, clip_y, clip_z].T
+            out_shape = (len(zs), len(ys), len(xs))
         else:
-            ret_data = bounding_data[clip_x, clip_y, clip_z]
+            out_shape = (len(xs), len(ys), len(zs))
+        ret_data = _empty_or_out(out_shape, out, dtype)
+
+        if self.compressed or (step_y == 1 and step_z == 1):
+            window = self.read_subarray(
+                start_x, start_y, start_z, end_x - start_x,
+                end_y - start_y, end_z - start_z, z_first=z_first,
+                dtype=dtype)
+            if z_first:
+                ret_data[...] = window[::step_z, ::step_y, ::step_x]
+            else:
+                ret_data[...] = window[::step_x, ::step_y, ::step_z]
+            return ret_data
+
+        p, q = self.header['p'], self.header['q']
+        # Only the subgrids holding selected cells are read
+        p_subgrids = np.unique(_chunk_index_of_cells(self.chunks['x'], xs))
+        q_subgrids = np.unique(_chunk_index_of_cells(self.chunks['y'], ys))
+        r_subgrids = np.unique(_chunk_index_of_cells(self.chunks['z'], zs))
+        fd = self.f.fileno()
+        n_rows, n_bytes, cells_read = 0, 0, 0
+        io_seconds, decode_seconds = 0.0, 0.0
+        for xsg, ysg, zsg in itertools.product(
+                p_subgrids, q_subgrids, r_subgrids):
+            subgrid_idx = xsg + (p * ysg) + (p * q * zsg)
+            x0, y0, z0 = self.subgrid_start_indices[subgrid_idx]
+            dx, dy, dz = self.subgrid_shapes[subgrid_idx]
+            sel_x = xs[(xs >= x0) & (xs < x0 + dx)]
+            sel_y = ys[(ys >= y0) & (ys < y0 + dy)]
+            sel_z = zs[(zs >= z0) & (zs < z0 + dz)]
+            # Each row runs from the first to the last selected x
+            row_len = int(sel_x[-1] - sel_x[0] + 1)
+            row_offsets = (self.subgrid_offsets[subgrid_idx] + 8 * (
+                (sel_x[0] - x0)
+                + dx * ((sel_y[None, :] - y0) + dy * (sel_z[:, None] - z0))
+            )).ravel()
+            io_start = time.perf_counter()
+            raw = b''.join(os.pread(fd, 8 * row_len, int(offset))
+                           for offset in row_offsets)
+            if len(raw) != 8 * row_len * len(row_offsets):
+                raise ValueError(f'Unexpected end of file in {self.filename}')
+            decode_start = time.perf_counter()
+            rows = np.frombuffer(raw, dtype='>f8').reshape(
+                len(sel_z), len(sel_y), row_len)[:, :, ::step_x]
+            ox = (sel_x[0] - start_x) // step_x
+            oy = (sel_y[0] - start_y) // step_y
+            oz = (sel_z[0] - start_z) // step_z
+            if z_first:
+                ret_data[oz:oz + len(sel_z), oy:oy + len(sel_y),
+                         ox:ox + len(sel_x)] = rows
+            else:
+                ret_data[ox:ox + len(sel_x), oy:oy + len(sel_y),
+                         oz:oz + len(sel_z)] = rows.T
+            decode_seconds += time.perf_counter() - decode_start
+            io_seconds += decode_start - io_start
+            n_rows += len(row_offsets)
+            n_bytes += len(raw)
+            cells_read += len(raw) // 8
+        self.stats.add(
+            read_calls=n_rows, bytes_read=n_bytes,
+            subgrids_read=len(p_subgrids) * len(q_subgrids) * len(r_subgrids),
+            cells_read=cells_read, cells_returned=ret_data.size,
+            io_seconds=io_seconds, decode_seconds=decode_seconds)
         return ret_data
 
+    def _iter_subgrid_reads(
+            self, subgrid_indices: Iterable[int]
+    ) -> Iterable[tuple]:
+        """
+        Read a set of subgrids with as few and as large reads as possible.
+        Subgrids which are adjacent in the file (for example along a row
+        of the subgrid-grid) are only separated by their 36 byte subgrid
+        header, so their byte ranges are coalesced into a single read.
+        The kernel is told about all of the ranges up front so that it
+        can start fetching them before the first one is decoded.
+
+        :param subgrid_indices:
+            The indices of the subgrids to read.
+        :returns:
+            An iterator of (subgrid index, big-endian subgrid view) pairs.
+            Each read buffer is released once its subgrids are consumed.
+        """
+        for buf, subgrids, buf_offsets in self._iter_read_ranges(
+                subgrid_indices):
+            buf_stops = buf_offsets + self._subgrid_nbytes(subgrids)
+            for subgrid_idx, start, stop in zip(
+                    subgrids, buf_offsets, buf_stops):
+                raw = buf[start:stop]
+                yield subgrid_idx, self._decode_subgrid(subgrid_idx, raw)
+
+    def _iter_read_ranges(
+            self, subgrid_indices: Iterable[int]
+    ) -> Iterable[tuple]:
+        """
+        Read the coalesced byte ranges holding a set of subgrids, see
+        ``_iter_subgrid_reads``.
+
+        :param subgrid_indices:
+            The indices of the subgrids to read.
+        :returns:
+            An iterator of (read buffer, subgrid indices, offsets of the
+            subgrids in the buffer) for each range.
+        """
+        subgrid_indices = np.asarray(subgrid_indices, dtype=np.int64)
+        starts, stops = self._subgrid_byte_ranges(subgrid_indices)
+        ranges = _coalesce_ranges(starts, stops)
+        self.stats.add(
+            subgrids_read=len(subgrid_indices),
+            cells_read=int(np.sum(
+                np.prod(self.subgrid_shapes[subgrid_indices], axis=1))))
+        for start, stop, _ in ranges:
+            _advise_willneed(self.f, start, stop - start)
+        for start, stop, members in ranges:
+            io_start = time.perf_counter()
+            buf = np.empty(stop - start, dtype=np.uint8)
+            self.f.seek(start)
+            if self.f.readinto(buf) != len(buf):
+                raise ValueError(f'Unexpected end of file in {self.filename}')
+            self.stats.add(read_calls=1, bytes_read=len(buf),
+                           io_seconds=time.perf_counter() - io_start)
+            members = np.asarray(members, dtype=np.int64)
+            yield buf, subgrid_indices[members], starts[members] - start
+
+    def _subgrid_byte_ranges(self, subgrid_indices: np.ndarray) -> tuple:
+        """
+        Get the byte ranges holding the data of subgrids, as a tuple
+        of arrays (first byte, one past the last byte).
+        """
+        if self.compressed:
+            return (self.chunk_offsets[subgrid_indices],
+                    self.chunk_offsets[subgrid_indices + 1])
+        starts = self.subgrid_offsets[subgrid_indices]
+        return starts, starts + self._subgrid_nbytes(subgrid_indices)
+
+    def _subgrid_nbytes(self, subgrid_indices: np.ndarray) -> np.ndarray:
+        """Get the number of bytes the data of subgrids take in the file"""
+        if self.compressed:
+            return (self.chunk_offsets[subgrid_indices + 1]
+                    - self.chunk_offsets[subgrid_indices])
+        return 8 * np.prod(self.subgrid_shapes[subgrid_indices], axis=1)
+
+    def _use_decode_kernel(self, n_subgrids: int) -> bool:
+        """Whether to decode with ``_decode_subgrids_kernel`` or NumPy"""
+        return (HAS_NUMBA and not self.compressed
+                and n_subgrids >= _DECODE_KERNEL_MIN_SUBGRIDS)
+
+    def _decode_subgrid(self, idx: int, raw: np.ndarray) -> np.ndarray:
+        """
+        Turn the raw bytes of a subgrid into a big-endian view with
+        dimensions (sg_nx, sg_ny, sg_nz), decompressing if needed.
+        """
+        if self.compressed:
+            _require_blosc2()
+            decode_start = time.perf_counter()
+            raw = np.frombuffer(blosc2.decompress(raw), dtype=np.uint8)
+            self.stats.add(decode_seconds=time.perf_counter() - decode_start)
+        return raw.view('>f8').reshape(
+            tuple(self.subgrid_shapes[idx]), order='F')
 
     def loc_subgrid(self, sg_p: int, sg_q: int, sg_r: int) -> np.ndarray:
         """
@@ -653,21 +2796,34 @@ class ParflowBinaryReader:
         subgrid_idx = sg_p + (p * sg_q) + (q * p * sg_r)
         return self.iloc_subgrid(subgrid_idx)
 
-    def iloc_subgrid(self, idx: int) -> np.ndarray:
+    def iloc_subgrid(self, idx: int, dtype=np.float64) -> np.ndarray:
         """
         Read a subgrid at some scalar index.
 
         :param idx:
             The index of the subgrid to read
+        :param dtype:
+            The data type of the returned array. Default is float64.
         :returns:
             The data from the idx'th subgrid.
         """
-        offset = self.subgrid_offsets[idx]
+        start_time = time.perf_counter()
         shape = self.subgrid_shapes[idx]
-        return self._backend_iloc_subgrid(offset, shape)
+        if self.compressed:
+            data = np.empty(tuple(shape), dtype=dtype, order='F')
+            data[...] = self._backend_subgrid_view(idx)
+        else:
+            offset = self.subgrid_offsets[idx]
+            data = self._backend_iloc_subgrid(offset, shape, dtype)
+            self.stats.add(bytes_mapped=8 * data.size)
+        self.stats.add(subgrids_read=1,
+                       cells_read=data.size,
+                       cells_returned=data.size,
+                       decode_seconds=time.perf_counter() - start_time)
+        return data
 
     def _backend_iloc_subgrid(
-            self, offset: int, shape: Iterable[int]
+            self, offset: int, shape: Iterable[int], dtype=np.float64
     ) -> np.ndarray:
         """
         Backend function for memory mapping data from the pfb file on disk.
@@ -676,22 +2832,74 @@ class ParflowBinaryReader:
             The byte offset to begin reading the sugrid data at.
         :param shape:
             A tuple representing the resulting shape of the subgrid array.
+        :param dtype:
+            The data type of the returned array. Default is float64.
         :returns:
             The data from the subgrid at ``offset` bytes into the file.
         """
-        mm = np.memmap(
-            self.f,
-            dtype=np.float64,
-            mode='r',
-            offset=offset,
-            shape=tuple(shape),
-            order='F'
-        ).byteswap()
-        data = np.array(mm)
+        # Byteswapping (and any conversion to ``dtype``) happens during
+        # the assignment, so the data is only copied once
+        data = np.empty(tuple(shape), dtype=dtype, order='F')
+        data[...] = self._backend_view(offset, shape)
         return data
 
+    def _backend_view(
+            self, offset: int, shape: Iterable[int]
+    ) -> np.ndarray:
+        """
+        Backend function for a lazy, big-endian view of data on disk.
+        The whole file is memory mapped once per reader and every view
+        is a slice of that map. Nothing is read or byteswapped until the
+        view (or a slice of it) is assigned into a native array.
+
+        :param offset:
+            The byte offset to begin the view at.
+        :param shape:
+            A tuple representing the shape of the (Fortran ordered) view.
+        :returns:
+            A read-only view of the data at ``offset`` bytes into the file.
+        """
+        shape = tuple(int(s) for s in shape)
+        offset = int(offset)
+        n_bytes = 8 * int(np.prod(shape))
+        return (self._get_file_map()[offset:offset + n_bytes]
+                .view('>f8')
+                .reshape(shape, order='F'))
+
+    def _get_file_map(self) -> np.ndarray:
+        """Memory map the whole file as bytes, once per reader"""
+        if self._file_map is None:
+            self._file_map = np.memmap(self.f, dtype=np.uint8, mode='r')
+            self.stats.add(memmaps_created=1)
+        return self._file_map
+
+    def _backend_subgrid_view(self, idx: int) -> np.ndarray:
+        """
+        Backend function for a lazy, big-endian view of a subgrid on disk.
+        See ``_backend_view`` for details. Compressed subgrids are
+        decompressed here, so their views are not lazy.
+
+        :param idx:
+            The index of the subgrid to view.
+        :returns:
+            A read-only view of the idx'th subgrid with dimensions
+            (sg_nx, sg_ny, sg_nz).
+        """
+        if self.compressed:
+            raw = self._get_file_map()[
+                self.chunk_offsets[idx]:self.chunk_offsets[idx + 1]]
+            return self._decode_subgrid(idx, raw)
+        return self._backend_view(
+            self.subgrid_offsets[idx], self.subgrid_shapes[idx]
+        )
+
     def read_all_subgrids(
-            self, mode: str='full', z_first: bool=True
+            self,
+            mode: str='full',
+            z_first: bool=True,
+            workers: int=None,
+            out: np.ndarray=None,
+            dtype=np.float64
     ) -> Union[Iterable[np.ndarray], np.ndarray]:
         """
         Read all of the subgrids in the file.
@@ -701,6 +2909,17 @@ class ParflowBinaryReader:
         :param z_first:
             Whether the z dimension should be first. If true returned arrays have
             dimensions ('z', 'y', 'x') else ('x', 'y', 'z')
+        :param workers:
+            The number of threads used to decode and place subgrids. Numpy
+            releases the GIL while byteswapping, so this scales well when the
+            file is already in the page cache. Optional, by default subgrids
+            are decoded serially.
+        :param out:
+            An array (or view) to read the data into when ``mode`` is
+            ``full``. Optional, if not given a new array is allocated.
+        :param dtype:
+            The data type of the returned arrays, if ``out`` is not given.
+            Values are converted while they are byteswapped.
 
         :returns:
             A numpy array or iterable of numpy arrays, depending on how ``mode`` is set.
@@ -714,34 +2933,237 @@ class ParflowBinaryReader:
         if mode not in ['flat', 'tiled', 'full']:
             raise Exception('mode must be one of flat, tiled, or full')
         if mode in ['flat', 'tiled']:
-            all_data = []
-            for i in range(self.header['n_subgrids']):
-                if z_first:
-                    all_data.append(self.iloc_subgrid(i).T)
-                else:
-                    all_data.append(self.iloc_subgrid(i))
+            if z_first:
+                read_subgrid = lambda i: self.iloc_subgrid(i, dtype).T
+            else:
+                read_subgrid = partial(self.iloc_subgrid, dtype=dtype)
+            all_data = _thread_map(
+                read_subgrid, range(self.header['n_subgrids']), workers)
             if mode == 'tiled':
+                # Fill element-wise, otherwise numpy tries to broadcast
+                # subgrids which happen to share a shape into one array
+                tiled_data = np.empty(len(all_data), dtype=object)
+                for i, sg_data in enumerate(all_data):
+                    tiled_data[i] = sg_data
                 if z_first:
                     tiled_shape = tuple(self.header[dim] for dim in ['r', 'q', 'p'])
-                    all_data = np.array(all_data, dtype=object).reshape(tiled_shape)
+                    all_data = tiled_data.reshape(tiled_shape)
                 else:
                     tiled_shape = tuple(self.header[dim] for dim in ['p', 'q', 'r'])
-                    all_data = np.array(all_data, dtype=object).reshape(tiled_shape)
+                    all_data = tiled_data.reshape(tiled_shape)
         elif mode == 'full':
             if z_first:
                 full_shape = tuple(self.header[dim] for dim in ['nz', 'ny', 'nx'])
             else:
                 full_shape = tuple(self.header[dim] for dim in ['nx', 'ny', 'nz'])
-            chunks = self.chunks['x'], self.chunks['y'], self.chunks['z']
-            all_data = np.empty(full_shape, dtype=np.float64)
-            for i in range(self.header['n_subgrids']):
-                nx, ny, nz = self.subgrid_shapes[i]
-                ix, iy, iz = self.subgrid_start_indices[i]
+            all_data = _empty_or_out(full_shape, out, dtype)
+
+            use_kernel = self._use_decode_kernel(self.header['n_subgrids'])
+
+            def _place_subgrids(subgrids):
+                if use_kernel:
+                    _decode_subgrids_kernel(
+                        self._get_file_map(), self.subgrid_offsets[subgrids],
+                        self.subgrid_start_indices[subgrids],
+                        self.subgrid_shapes[subgrids],
+                        0, 0, 0, self.header['nx'], self.header['ny'],
+                        self.header['nz'], all_data, z_first)
+                    return
+                # Each subgrid is decoded from the file map straight into
+                # its place in the output, without intermediate arrays
+                for i in subgrids:
+                    nx, ny, nz = self.subgrid_shapes[i]
+                    ix, iy, iz = self.subgrid_start_indices[i]
+                    if z_first:
+                        all_data[iz:iz+nz, iy:iy+ny, ix:ix+nx] = self._backend_subgrid_view(i).T
+                    else:
+                        all_data[ix:ix+nx, iy:iy+ny, iz:iz+nz] = self._backend_subgrid_view(i)
+
+            # Every subgrid is needed, so let the kernel start
+            # reading the whole file before decoding begins
+            _advise_willneed(self.f, 0, 0)
+            start_time = time.perf_counter()
+            # Subgrids never overlap, so each worker gets a contiguous
+            # batch of them and writes into its own part of the output
+            n_batches = max(1, min(workers or 1, self.header['n_subgrids']))
+            batches = np.array_split(
+                np.arange(self.header['n_subgrids']), n_batches)
+            _thread_map(_place_subgrids, batches, workers)
+            self.stats.add(
+                subgrids_read=self.header['n_subgrids'],
+                cells_read=all_data.size,
+                cells_returned=all_data.size,
+                bytes_mapped=0 if self.compressed else 8 * all_data.size,
+                decode_seconds=time.perf_counter() - start_time)
+        return all_data
+
+
+# -----------------------------------------------------------------------------
+
+# Largest gap, in bytes, between two ranges that are read as one. This
+# is the size of a subgrid header, so only adjacent subgrids are merged.
+_COALESCE_MAX_GAP = 36
+# Upper bound on the size of a single coalesced read
+_COALESCE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def _coalesce_ranges(
+    starts, stops,
+    max_gap=_COALESCE_MAX_GAP,
+    max_bytes=_COALESCE_MAX_BYTES
+) -> list:
+    """
+    Merge byte ranges which are separated by at most ``max_gap`` bytes
+    into larger ranges of at most ``max_bytes`` bytes (unless a single
+    range is already larger).
+
+    :param starts:
+        The first byte of each range.
+    :param stops:
+        One past the last byte of each range.
+    :return:
+        A list of (start, stop, members) tuples sorted by start, where
+        members are the indices of the input ranges covered.
+    """
+    ranges = []
+    for i in np.argsort(starts, kind='stable'):
+        start, stop = int(starts[i]), int(stops[i])
+        if ranges:
+            r_start, r_stop, members = ranges[-1]
+            if (start - r_stop <= max_gap
+                    and max(stop, r_stop) - r_start <= max_bytes):
+                ranges[-1] = (r_start, max(stop, r_stop), members + [int(i)])
+                continue
+        ranges.append((start, stop, [int(i)]))
+    return ranges
+
+
+def _advise_willneed(f, offset, length):
+    """
+    Tell the kernel that a byte range of an open file will be read soon, so
+    it can start reading it ahead. A length of 0 means to the end of the
+    file. This is only a hint and does nothing where it is not supported.
+    """
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(
+                f.fileno(), int(offset), int(length), os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+
+
+# Upper bound on the size of the buffer for a single write in write_pfb
+_WRITE_BATCH_BYTES = 64 * 1024 * 1024
+
+
+def _pwrite_all(fd, data, offset):
+    """Write all of ``data`` to ``fd`` at ``offset``, retrying short writes"""
+    view = memoryview(data).cast('B')
+    while len(view):
+        n = os.pwrite(fd, view, offset)
+        view = view[n:]
+        offset += n
+
+
+def _empty_or_out(shape, out=None, dtype=np.float64) -> np.ndarray:
+    """
+    Allocate an output array of the given shape and dtype, or check that
+    a user supplied ``out`` array has that shape and return it.
+    """
+    if out is None:
+        return np.empty(shape, dtype=dtype)
+    if tuple(out.shape) != tuple(shape):
+        raise ValueError(f'Output array has shape {out.shape}, '
+                         f'expected {tuple(shape)}')
+    return out
+
+
+def _thread_map(func, items, workers=None) -> list:
+    """
+    Apply ``func`` to each of ``items`` on a pool of ``workers`` threads
+    and return the results in order. If ``workers`` is not greater than
+    one everything runs serially in the calling thread.
+
+    :param func:
+        The function to apply.
+    :param items:
+        An iterable of arguments, one for each call of ``func``.
+    :param workers:
+        The number of threads to use.
+    """
+    if not workers or workers <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, items))
+
+
+# The compiled decoding kernel saves the per-subgrid overhead of NumPy
+# assignments, but NumPy is as fast or faster on a few large subgrids.
+# Reads of fewer subgrids than this keep using NumPy.
+_DECODE_KERNEL_MIN_SUBGRIDS = 16
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def _decode_subgrids_kernel(
+    buf, offsets, starts, shapes,
+    wx0, wy0, wz0, wx1, wy1, wz1,
+    out, z_first
+):
+    """
+    Byteswap big-endian subgrids straight into their place in an output
+    array, in a single compiled pass over the subgrids. Only the part of
+    each subgrid within the window [wx0, wx1) x [wy0, wy1) x [wz0, wz1)
+    is decoded. This releases the GIL, so batches of subgrids can be
+    decoded on several threads.
+
+    :param buf:
+        The raw bytes holding the subgrids, a file map or read buffer.
+    :param offsets:
+        The offset in ``buf`` of the data of each subgrid.
+    :param starts:
+        The (x, y, z) index of the first cell of each subgrid.
+    :param shapes:
+        The (nx, ny, nz) shape of each subgrid.
+    :param out:
+        The output array, with dimensions (z, y, x) of the window
+        if z_first, else (x, y, z).
+    :param z_first:
+        Whether the z dimension of ``out`` is first.
+    """
+    # Rows along x are contiguous in the file, each one is swapped into
+    # this buffer and then converted to the type of ``out`` as it is placed
+    swapped = np.empty(max(1, wx1 - wx0), dtype=np.uint64)
+    values = swapped.view(np.float64)
+    for s in range(len(offsets)):
+        x0, y0, z0 = starts[s, 0], starts[s, 1], starts[s, 2]
+        dx, dy, dz = shapes[s, 0], shapes[s, 1], shapes[s, 2]
+        ix0, ix1 = max(x0, wx0), min(x0 + dx, wx1)
+        iy0, iy1 = max(y0, wy0), min(y0 + dy, wy1)
+        iz0, iz1 = max(z0, wz0), min(z0 + dz, wz1)
+        if ix0 >= ix1 or iy0 >= iy1 or iz0 >= iz1:
+            continue
+        words = buf[offsets[s]:offsets[s] + 8 * dx * dy * dz].view(np.uint64)
+        n = ix1 - ix0
+        for k in range(iz0, iz1):
+            for j in range(iy0, iy1):
+                row = (ix0 - x0) + dx * ((j - y0) + dy * (k - z0))
+                for i in range(n):
+                    w = words[row + i]
+                    swapped[i] = (
+                        ((w & np.uint64(0x00000000000000ff)) << np.uint64(56))
+                        | ((w & np.uint64(0x000000000000ff00)) << np.uint64(40))
+                        | ((w & np.uint64(0x0000000000ff0000)) << np.uint64(24))
+                        | ((w & np.uint64(0x00000000ff000000)) << np.uint64(8))
+                        | ((w >> np.uint64(8)) & np.uint64(0x00000000ff000000))
+                        | ((w >> np.uint64(24)) & np.uint64(0x0000000000ff0000))
+                        | ((w >> np.uint64(40)) & np.uint64(0x000000000000ff00))
+                        | (w >> np.uint64(56)))
                 if z_first:
-                    all_data[iz:iz+nz, iy:iy+ny, ix:ix+nx] = self.iloc_subgrid(i).T
+                    for i in range(n):
+                        out[k - wz0, j - wy0, ix0 - wx0 + i] = values[i]
                 else:
-                    all_data[ix:ix+nx, iy:iy+ny, iz:iz+nz] = self.iloc_subgrid(i)
-        return all_data
+                    for i in range(n):
+                        out[ix0 - wx0 + i, j - wy0, k - wz0] = values[i]
 
 
 # -----------------------------------------------------------------------------
@@ -871,6 +3293,17 @@ def subgrid_size(
     return sg_nx, sg_ny, sg_nz
 
 
+# -----------------------------------------------------------------------------
+
+def _chunk_index_of_cells(chunks, idx) -> np.ndarray:
+    """
+    Get the index of the subgrid containing cells along a single axis from
+    the sizes of the subgrids along that axis, as in ``compute_chunks``,
+    which may have any sizes.
+    """
+    return np.searchsorted(np.cumsum(chunks), idx, side='right')
+
+
 # -----------------------------------------------------------------------------
 
 @jit()
@@ -934,6 +3367,171 @@ def precalculate_subgrid_info(nx, ny, nz, p, q, r):
     return subgrid_offsets, subgrid_locs, subgrid_begin_idxs, subgrid_shapes
 
 
+# -----------------------------------------------------------------------------
+
+def compute_chunks(subgrid_shapes, p, q, r) -> Mapping[str, tuple]:
+    """
+    Computes the chunk sizes of the subgrids along each primary
+    coordinate axis. See ``ParflowBinaryReader._compute_chunks``.
+
+    :param subgrid_shapes:
+        An array of shape (n_subgrids, 3) with the size of each subgrid.
+    :param p:
+        Number of subgrids along the x-axis.
+    :param q:
+        Number of subgrids along the y-axis.
+    :param r:
+        Number of subgrids along the z-axis.
+    """
+    x_chunks = tuple(int(c) for c in subgrid_shapes[:,0][0:p])
+    y_chunks = tuple(int(c) for c in subgrid_shapes[:,1][0:p*q:p])
+    z_chunks = tuple(int(c) for c in subgrid_shapes[:,2][0:p*q*r:p*q])
+    return {'x': x_chunks, 'y': y_chunks, 'z': z_chunks}
+
+
+def compute_coords(chunks) -> Mapping[str, Iterable[Iterable[int]]]:
+    """
+    Computes the coordinates of each chunk of the subgrids along each
+    primary coordinate axis. See ``ParflowBinaryReader._compute_coords``.
+
+    :param chunks:
+        The chunk sizes, as returned by ``compute_chunks``.
+    """
+    coords = {'x': [], 'y': [], 'z': []}
+    for c in ['x', 'y', 'z']:
+        chunk_start = 0
+        for chunk in chunks[c]:
+            coords[c].append(np.arange(chunk_start, chunk_start + chunk))
+            chunk_start += chunk
+    return coords
+
+
+# -----------------------------------------------------------------------------
+
+class SubgridLayout(NamedTuple):
+    """
+    The subgrid layout of a pfb file, as computed by ``get_subgrid_layout``.
+    All arrays are read-only since layouts are shared between readers.
+    """
+    offsets: np.ndarray
+    locations: np.ndarray
+    start_indices: np.ndarray
+    shapes: np.ndarray
+    chunks: Mapping[str, tuple]
+    coords: Mapping[str, tuple]
+
+
+def _read_only(arr) -> np.ndarray:
+    """Return ``arr`` as a numpy array which can not be written to"""
+    arr = np.array(arr)
+    arr.flags.writeable = False
+    return arr
+
+
+def _make_subgrid_layout(
+    offsets, locations, start_indices, shapes, p, q, r
+) -> SubgridLayout:
+    """Build a read-only ``SubgridLayout`` from per-subgrid arrays"""
+    # Keep the 2d shape even for an empty layout
+    shapes = _read_only(np.array(shapes, dtype=np.int64).reshape(-1, 3))
+    chunks = compute_chunks(shapes, p, q, r)
+    coords = compute_coords(chunks)
+    return SubgridLayout(
+        offsets=_read_only(np.array(offsets, dtype=np.int64)),
+        locations=_read_only(np.array(locations, dtype=np.int64).reshape(-1, 3)),
+        start_indices=_read_only(
+            np.array(start_indices, dtype=np.int64).reshape(-1, 3)),
+        shapes=shapes,
+        chunks=MappingProxyType(chunks),
+        coords=MappingProxyType(
+            {c: tuple(_read_only(a) for a in v) for c, v in coords.items()}),
+    )
+
+
+@lru_cache(maxsize=128)
+def _cached_subgrid_layout(nx, ny, nz, p, q, r) -> SubgridLayout:
+    """Cached backend for ``get_subgrid_layout``"""
+    sg_offs, sg_locs, sg_starts, sg_shapes = precalculate_subgrid_info(
+        nx, ny, nz, p, q, r
+    )
+    return _make_subgrid_layout(
+        sg_offs, sg_locs, sg_starts, sg_shapes, p, q, r)
+
+
+def get_subgrid_layout(nx, ny, nz, p, q, r) -> SubgridLayout:
+    """
+    Get the subgrid layout for a grid and processor topology. Many files
+    (for example all of the timesteps of a run, or years of forcing files)
+    share a layout, so layouts are cached process-wide keyed by
+    (nx, ny, nz, p, q, r). The cache holds up to 128 layouts, least
+    recently used layouts are evicted first.
+
+    :param nx:
+        Number of cells along the x-axis.
+    :param ny:
+        Number of cells along the y-axis.
+    :param nz:
+        Number of cells along the z-axis.
+    :param p:
+        Number of subgrids along the x-axis.
+    :param q:
+        Number of subgrids along the y-axis.
+    :param r:
+        Number of subgrids along the z-axis.
+
+    :return:
+        A ``SubgridLayout`` with the subgrid offsets, locations, lower
+        left indices and shapes, as well as the chunks and coordinates.
+    """
+    return _cached_subgrid_layout(
+        int(nx), int(ny), int(nz), int(p), int(q), int(r))
+
+
+def subgrid_layout_from_arrays(offsets, start_indices, shapes) -> SubgridLayout:
+    """
+    Build a subgrid layout from the offsets, lower left indices and shapes
+    of every subgrid, such as those in the subgrid headers of a file.
+    Unlike with ``get_subgrid_layout`` the subgrids may have any sizes,
+    but they must still form a grid of p by q by r boxes, stored with
+    the x index varying fastest.
+
+    :param offsets:
+        The byte offset of the data of each subgrid.
+    :param start_indices:
+        An array of shape (n_subgrids, 3) with the lower left index
+        of each subgrid.
+    :param shapes:
+        An array of shape (n_subgrids, 3) with the size of each subgrid.
+
+    :return:
+        A ``SubgridLayout``.
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    start_indices = np.asarray(start_indices, dtype=np.int64).reshape(-1, 3)
+    shapes = np.asarray(shapes, dtype=np.int64).reshape(-1, 3)
+    axis_starts = [np.unique(start_indices[:, i]) for i in range(3)]
+    p, q, r = (len(s) for s in axis_starts)
+    locations = np.stack([np.searchsorted(s, start_indices[:, i])
+                          for i, s in enumerate(axis_starts)], axis=1)
+    order = locations[:, 0] + p * locations[:, 1] + p * q * locations[:, 2]
+    is_grid = (p * q * r == len(offsets)
+               and np.array_equal(order, np.arange(len(offsets))))
+    if is_grid:
+        # Every subgrid must fill its row, column and layer of the grid
+        chunks = compute_chunks(shapes, p, q, r)
+        for i, c in enumerate('xyz'):
+            sizes = np.array(chunks[c], dtype=np.int64)
+            is_grid = (is_grid
+                       and np.array_equal(shapes[:, i], sizes[locations[:, i]])
+                       and np.array_equal(axis_starts[i],
+                                          np.cumsum(sizes) - sizes))
+    if not is_grid:
+        raise ValueError('Subgrids do not form a grid of boxes '
+                         'with the x index varying fastest')
+    return _make_subgrid_layout(
+        offsets, locations, start_indices, shapes, p, q, r)
+
+
 # -----------------------------------------------------------------------------
 
 def load_patch_matrix_from_image_file(file_name, color_to_patch=None,
@@ -1306,6 +3904,25 @@ def read_clm(file_name, type='clmin'):
 
 # -----------------------------------------------------------------------------
 
+# Variables of CLM output, in the order of the layers of the single file
+# output. 't_soil' is last, with one layer per root zone layer.
+CLM_OUTPUT_VARIABLES = (
+    'eflx_lh_tot',
+    'eflx_lwrad_out',
+    'eflx_sh_tot',
+    'eflx_soil_grnd',
+    'qflx_evap_tot',
+    'qflx_evap_grnd',
+    'qflx_evap_soi',
+    'qflx_evap_veg',
+    'qflx_tran_veg',
+    'qflx_infl',
+    'swe_out',
+    't_grnd',
+    'qflx_qirr',
+    't_soil',
+)
+
 
 class DataAccessor:
     """Helper for extracting numpy array from a given run"""
@@ -1676,20 +4293,7 @@ class DataAccessor:
 
     @property
     def clm_output_variables(self):
-        return ('eflx_lh_tot',
-                'eflx_lwrad_out',
-                'eflx_sh_tot',
-                'eflx_soil_grnd',
-                'qflx_evap_tot',
-                'qflx_evap_grnd',
-                'qflx_evap_soi',
-                'qflx_evap_veg',
-                'qflx_tran_veg',
-                'qflx_infl',
-                'swe_out',
-                't_grnd',
-                'qflx_qirr',
-                't_soil')
+        return CLM_OUTPUT_VARIABLES
 
     @property
     def clm_output_diagnostics(self):
@@ -1,21 +1,36 @@
 import contextlib
 import dask
+import dask.array
+import dask.utils
 import json
 import numpy as np
 import pandas as pd
 import os
+import threading
 import warnings
+import weakref
 import xarray as xr
 import yaml
 
 from pprint import pprint
 from . import util
-from .io import ParflowBinaryReader, read_pfb_sequence, read_pfb
-from collections.abc import Iterable
-from typing import Mapping, List, Union
+from .io import (
+    GLOBAL_READER_POOL,
+    ParflowBinaryReader,
+    read_pfb_sequence,
+    read_pfb,
+    read_pfb_points,
+    read_pfb_store,
+    read_pfb_store_index,
+    is_pfb_store,
+    CLM_OUTPUT_VARIABLES,
+    PFB_STORE_DIMS,
+)
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping, Sequence
+from typing import List, Union
 from xarray.backends  import BackendEntrypoint, BackendArray
 from xarray.core import indexing
-from dask import delayed
 
 
 class ParflowBackendEntrypoint(BackendEntrypoint):
@@ -27,6 +42,9 @@ class ParflowBackendEntrypoint(BackendEntrypoint):
     should interact with this code by using the xarray library directly.
     """
 
+    base_dir = None
+    domains = {}
+
     open_dataset_parameters = [
         "filename_or_obj",
         "drop_variables",
@@ -49,14 +67,14 @@ class ParflowBackendEntrypoint(BackendEntrypoint):
         read_outputs=True,
         inferred_dims=None,
         inferred_shape=None,
-        chunks={},
+        chunks=None,
         strict_ext_check=False,
     ) -> xr.Dataset:
         """
         Open Parflow input/output as an xarray.Dataset.
 
         :param filename_or_obj:
-            The pfb file or pfmetadata file to read.
+            The pfb file, pfmetadata file, or pfb store directory to read.
         :param base_dir:
             A base directory to read from. This is optional, but allows
             you to specify a common directory to read multiple files from
@@ -81,13 +99,18 @@ class ParflowBackendEntrypoint(BackendEntrypoint):
             The chunking scheme to apply along dimensions. See:
             https://xarray.pydata.org/en/stable/generated/xarray.Dataset.chunk.html
             for useage options. This is primarily set for automatically paralellizing
-            computations via dask.
+            computations via dask. Dimensions which are not given follow the
+            layout of the files, see ``ParflowBackendArray.preferred_chunks``,
+            so each dask task reads one file or a block of whole subgrids.
+            By default the variables are not chunked, but lazily indexed, so
+            that only the selected cells are read. With ``xr.open_dataset``
+            pass ``chunks={}`` to chunk variables like this instead.
         :param strict_ext_check:
             Whether or not to strictly check the filename extension for
             determining if we are opening a pfb file or a pfmetadata file.
-            Strict checks will actually try to open the file, while non-strict
-            simply check the filename extension. This can slightly improve performance
-            when reading many pfb files.
+            Strict checks will actually look at the contents of the file, while
+            non-strict simply check the filename extension. This can slightly improve
+            performance when reading many pfb files.
         :return:
             An xr.Dataset with a collection of xr.DataArray objects as variables.
         """
@@ -98,19 +121,52 @@ class ParflowBackendEntrypoint(BackendEntrypoint):
                       filename_or_obj,
                       dims=inferred_dims,
                       shape=inferred_shape)
-            ds = xr.Dataset({name: data}).chunk(chunks)
+            ds = xr.Dataset({name: data})
         elif filetype == 'pfmetadata':
             # Reads full simulation input/output from pfmetadata
             if base_dir:
                 self.base_dir = base_dir
             else:
                 self.base_dir = os.path.dirname(filename_or_obj)
+            self.domains = self.pf_meta.get('domains', {})
             ds = self.load_pfmetadata(
                     filename_or_obj,
                     self.pf_meta,
                     read_inputs=read_inputs,
                     read_outputs=read_outputs,
             )
+        elif filetype == 'pfbstore':
+            # Reads time series rechunked by `write_pfb_store`
+            self.domains = {}
+            ds = self.load_pfb_store(
+                    filename_or_obj,
+                    drop_variables=drop_variables,
+            )
+        return self.chunk_variables(ds, chunks)
+
+    def chunk_variables(self, ds, chunks) -> xr.Dataset:
+        """
+        Chunk the data variables of a dataset, using the preferred chunks
+        of each variable (recorded in its encoding) along the dimensions
+        which are not in ``chunks``.
+
+        :param ds:
+            The dataset to chunk.
+        :param chunks:
+            The chunking scheme, see ``open_dataset``.
+        :return:
+            The chunked dataset.
+        """
+        if chunks is None:
+            return ds
+        for var in list(ds.data_vars):
+            preferred = ds[var].encoding.get('preferred_chunks', {})
+            if isinstance(chunks, Mapping):
+                var_chunks = {d: chunks.get(d, preferred.get(d, -1))
+                              for d in ds[var].dims}
+            else:
+                var_chunks = chunks
+            ds[var] = ds[var].chunk(var_chunks)
         return ds
 
     def load_pfmetadata(
@@ -163,6 +219,33 @@ class ParflowBackendEntrypoint(BackendEntrypoint):
                         ds[k] = v
         return ds
 
+    def load_pfb_store(self, store_dir, drop_variables=None) -> xr.Dataset:
+        """
+        Helper method to load the variables of a pfb store.
+
+        :param store_dir:
+            The directory of the pfb store.
+        :param drop_variables:
+            Names of variables in the store to skip.
+        :return:
+            The assembled xarray dataset
+        """
+        store_index = read_pfb_store_index(store_dir)
+        ds = xr.Dataset()
+        ds.attrs['pf_store'] = store_dir
+        if store_index['coordinates']:
+            coords = self.load_coords_from_meta(store_index['coordinates'])
+            ds = ds.assign_coords(coords)
+        for var in store_index['variables']:
+            if drop_variables and var in drop_variables:
+                continue
+            data = indexing.LazilyIndexedArray(
+                ParflowBackendArray(store_dir, store_variable=var))
+            ds[var] = xr.Variable(
+                data.array.dims, data,
+                encoding={'preferred_chunks': _PreferredChunks(data.array)})
+        return ds
+
     def load_coords_from_meta(self, coord_meta) -> Mapping[str, xr.DataArray]:
         """
         Builds coordinate variables from the 'coordinates' section of
@@ -207,9 +290,10 @@ class ParflowBackendEntrypoint(BackendEntrypoint):
             # Is it normal
             else:
                 filename = var_meta['data'][0]['file']
-                if not os.path.exists(filename):
-                    filename = f'{self.base_dir}/{filename}'
-                v = self.load_single_pfb(filename)
+                v = self.load_single_pfb(
+                    filename,
+                    header=self.header_from_meta(var_meta),
+                    base_dir=self.base_dir)
                 ret_das = {name: xr.Dataset({name: v})[name]}
         elif base_type == 'clm_output':
             ret_das = self.load_clm_output_pfb(var_meta, name)
@@ -233,9 +317,10 @@ class ParflowBackendEntrypoint(BackendEntrypoint):
             component = sub_dict['component']
             comp_name = f'{name}_{component}'
             file = sub_dict['file']
-            if not os.path.exists(file):
-                file = f'{self.base_dir}/{file}'
-            v = self.load_single_pfb(file)
+            v = self.load_single_pfb(
+                file,
+                header=self.header_from_meta(var_meta),
+                base_dir=self.base_dir)
             all_da[comp_name] = xr.Dataset({comp_name: v})[comp_name]
         return all_da
 
@@ -245,20 +330,16 @@ class ParflowBackendEntrypoint(BackendEntrypoint):
         where a each file represents an individual time
         """
         file_template = var_meta['data'][0]['file-series']
-        n_time = 0
-        concat_dim = 'time'
-        time_idx = np.arange(*var_meta['data'][0]['time-range'])
-        n_time = time_idx[-1]
-        pad, fmt = file_template.split('.')[-2:]
-        basename = '.'.join(file_template.split('.')[:-2])
-        all_files = [f'{basename}.{pad%n}.{fmt}' for n in time_idx]
-        # Check if basename contains any of the files if not,
-        # fall back to `self.base_dir` from the pfmetadata file
-        if not os.path.exists(all_files[0]):
-            all_files = [f'{self.base_dir}/{af}' for af in all_files]
+        time_idx = range(*var_meta['data'][0]['time-range'])
+        # File names are only formatted when they are read, and the files
+        # are looked for in `self.base_dir` if they are not found as given
+        all_files = _FileSeries(file_template, time_idx)
 
         # Put it all together
-        base_da = self.load_sequence_of_pfb(all_files)
+        base_da = self.load_sequence_of_pfb(
+            all_files,
+            header=self.header_from_meta(var_meta),
+            base_dir=self.base_dir)
         base_da = xr.Dataset({name: base_da})[name]
         return {name: base_da}
 
@@ -273,17 +354,13 @@ class ParflowBackendEntrypoint(BackendEntrypoint):
         time_end = time_start + var_meta['data'][0]['times-between'][-1] - 1
         ntime = time_end[-1]
         file_template = var_meta['data'][0]['file-series']
-        pad, fmt = file_template.split('.')[-2:]
-        basename = '.'.join(file_template.split('.')[:-2])
-        all_files = [f'{basename}.{pad%(s,e)}.{fmt}'
-                     for s, e in zip(time_start, time_end)]
-        # Check if basename contains any of the files if not,
-        # fall back to `self.base_dir` from the pfmetadata file
-        if not os.path.exists(all_files[0]):
-            all_files = [f'{self.base_dir}/{af}' for af in all_files]
+        all_files = _FileSeries(
+            file_template,
+            [(int(s), int(e)) for s, e in zip(time_start, time_end)])
 
         # Put it all together
-        base_da = self.load_sequence_of_pfb(all_files, z_is='time')
+        base_da = self.load_sequence_of_pfb(
+            all_files, z_is='time', base_dir=self.base_dir)
         base_da = xr.Dataset({name: base_da})[name]
         return {name: base_da}
 
@@ -291,7 +368,12 @@ class ParflowBackendEntrypoint(BackendEntrypoint):
         """
         These filetypes have dimensions (time, x, y, variable)
         where the variable ordering is fixed and each file represents an
-        individual timestep
+        individual timestep. The variables are named as in
+        ``CLM_OUTPUT_VARIABLES``: the first 12 layers are always there,
+        followed by 'qflx_qirr' and 't_soil' (with the remaining layers)
+        if the files have them. The variables share a ``_LayerCache``,
+        so that loading all of them reads each file once, when their
+        windows fit in the cache.
         """
         warnings.warn("""
             Reading CLM output is not officially supported,
@@ -299,39 +381,23 @@ class ParflowBackendEntrypoint(BackendEntrypoint):
             but this may break in the future!
             """
         )
-        varnames = [
-            'latent_heat_flux',
-            'outgoing_longwave',
-            'sensible_heat_flux',
-            'ground_heat_flux',
-            'total_evapotranspiration',
-            'ground_evaporation',
-            'soil_evaporation',
-            'veg_evaporation',
-            'transpiration',
-            'infiltration',
-            'swe',
-            't_ground',
-        ]
         file_template = var_meta['data'][0]['file-series']
-        n_time = 0
-        concat_dim = 'time'
-        time_idx = np.arange(*var_meta['data'][0]['time-range'])
-        n_time = time_idx[-1]
-        pad, filler, fmt = file_template.split('.')[-3:]
-        basename = '.'.join(file_template.split('.')[:-3])
-        all_files = [f'{basename}.{pad%n}.{filler}.{fmt}' for n in time_idx]
-        # Check if basename contains any of the files if not,
-        # fall back to `self.base_dir` from the pfmetadata file
-        if not os.path.exists(all_files[0]):
-            all_files = [f'{self.base_dir}/{af}' for af in all_files]
-
-        clm_das = []
-        for i, v in enumerate(varnames):
-            var_da = self.load_sequence_of_pfb(all_files, init_key={'z': i})
-            var_da = xr.Dataset({v: var_da})[v]
-            clm_das.append(var_da)
-        clm_das = xr.merge(clm_das)
+        time_idx = range(*var_meta['data'][0]['time-range'])
+        all_files = _FileSeries(file_template, time_idx)
+
+        # The variables are layers of the same files, which are read with
+        # all of their layers by whichever variable reads them first. The
+        # number of layers is not recorded in the metadata.
+        header = ParflowBackendArray(all_files, base_dir=self.base_dir).header
+        n_layers = header['nz']
+        layer_cache = _LayerCache(n_layers)
+        clm_das = {}
+        for i, v in enumerate(CLM_OUTPUT_VARIABLES[:n_layers]):
+            layer = slice(i, n_layers) if v == 't_soil' else i
+            var_da = self.load_sequence_of_pfb(
+                all_files, init_key={'z': layer}, header=header,
+                base_dir=self.base_dir, layer_cache=layer_cache)
+            clm_das[v] = xr.Dataset({v: var_da})[v]
         return clm_das
 
     def load_single_pfb(
@@ -341,6 +407,8 @@ class ParflowBackendEntrypoint(BackendEntrypoint):
         shape=None,
         z_first=True,
         z_is='z',
+        header=None,
+        base_dir=None,
     ) -> xr.Variable:
         """
         Load a `pfb` file directly as an xr.Variable
@@ -351,13 +419,17 @@ class ParflowBackendEntrypoint(BackendEntrypoint):
                 dims=dims,
                 shape=shape,
                 z_first=z_first,
-                z_is=z_is
+                z_is=z_is,
+                header=header,
+                base_dir=base_dir,
         ))
         if not dims:
             dims = data.array.dims
         if not shape:
             shape = data.array.shape
-        var = xr.Variable(dims, data, )
+        var = xr.Variable(
+            dims, data,
+            encoding={'preferred_chunks': _PreferredChunks(data.array)})
         return var
 
     def load_sequence_of_pfb(
@@ -367,7 +439,10 @@ class ParflowBackendEntrypoint(BackendEntrypoint):
         shape=None,
         z_first=True,
         z_is='z',
-        init_key={}
+        init_key={},
+        header=None,
+        base_dir=None,
+        layer_cache=None,
     ) -> xr.Variable:
         data = indexing.LazilyIndexedArray(
             ParflowBackendArray(
@@ -377,20 +452,46 @@ class ParflowBackendEntrypoint(BackendEntrypoint):
                 z_first=z_first,
                 z_is=z_is,
                 init_key=init_key,
+                header=header,
+                base_dir=base_dir,
+                layer_cache=layer_cache,
         ))
         if not dims:
             dims = data.array.dims
         if not shape:
             shape = data.array.shape
-        var = xr.Variable(dims, data)
+        var = xr.Variable(
+            dims, data,
+            encoding={'preferred_chunks': _PreferredChunks(data.array)})
         return var
 
+    def header_from_meta(self, var_meta) -> Mapping[str, int]:
+        """
+        The grid size of the files of a variable, from the 'cell-extent'
+        of its domain in the 'domains' section of the pfmetadata file.
+        This lets variables be opened without reading the headers of
+        their files.
+
+        :param var_meta:
+            The metadata for the variable being read.
+        :returns:
+            A partial pfb header with 'nx', 'ny', and 'nz', or None if
+            the metadata does not record the grid size.
+        """
+        domain = self.domains.get(var_meta.get('domain'), {})
+        if 'cell-extent' not in domain:
+            return None
+        nx, ny, nz = (int(n) for n in domain['cell-extent'])
+        return {'nx': nx, 'ny': ny, 'nz': nz}
+
     def is_meta_or_pfb(self, filename_or_obj, strict=True):
         """Determine if a file is a pfb file or pfmetadata file"""
         def _check_dict_is_valid_meta(meta):
             assert 'parflow' in meta.keys(), \
                 ('Metadata file missing "parflow" key - ',
                  'are you sure this is a valid Parflow metadata file?')
+        if is_pfb_store(filename_or_obj):
+            return 'pfbstore'
         if not strict:
             # Just check the extension
             ext = filename_or_obj.split('.')[-1]
@@ -402,8 +503,16 @@ class ParflowBackendEntrypoint(BackendEntrypoint):
             return ext
 
         if isinstance(filename_or_obj, str):
+            # Metadata files are JSON objects, so they can be told apart
+            # from pfb files without trying to read them as a pfb
+            with open(filename_or_obj, 'rb') as f:
+                is_json = f.read(1024).lstrip()[:1] == b'{'
             try:
-                with ParflowBinaryReader(filename_or_obj) as pfd:
+                assert not is_json
+                with ParflowBinaryReader(
+                    filename_or_obj,
+                    precompute_subgrid_info=False
+                ) as pfd:
                     assert 'nx' in pfd.header
                     assert 'ny' in pfd.header
                     assert 'nz' in pfd.header
@@ -433,7 +542,12 @@ class ParflowBackendEntrypoint(BackendEntrypoint):
 
 
     def guess_can_open(self, filename_or_obj):
-        """Registers the backend to recognize *.pfb and *.pfmetadata files"""
+        """
+        Registers the backend to recognize *.pfb and *.pfmetadata files,
+        as well as pfb store directories
+        """
+        if is_pfb_store(filename_or_obj):
+            return True
         openable_extensions = ['pfb', 'pfmetadata']
         for ext in openable_extensions:
             if filename_or_obj.endswith(ext):
@@ -441,75 +555,253 @@ class ParflowBackendEntrypoint(BackendEntrypoint):
         return False
 
 
-def _getitem_no_state(file_or_seq, key, dims, mode, z_first=True, z_is='z'):
+class _FileSeries(Sequence):
+    """
+    The names of a series of files, such as the timesteps of a run, which
+    are formatted from a template as they are needed. Long series are
+    cheap to create, pickle and tokenize this way.
+    """
+
+    def __init__(self, template, values):
+        """
+        :param template:
+            The printf style template of the file names, such as
+            'run.out.press.%05d.pfb'.
+        :param values:
+            The values to format the template with, one for each file.
+        """
+        self.template = template
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.template % v for v in self.values[index]]
+        return self.template % self.values[index]
+
+
+def _read_window(
+    file_or_seq, window, mode, z_first=True, store_variable=None, file_prefix=''
+):
     """
     Base functionality for actually getting data out of PFB files.
+    Files are read with readers from ``GLOBAL_READER_POOL``, so repeated
+    reads of the same files do not open them and read their headers again.
 
     :param file_or_seq:
         File or files that should be read from.
-    :param key:
-        A key indicating which indices should be read into memory.
-    :param dims:
-        The dimensions of the dataset.
+    :param window:
+        A dictionary of (start, stop) indices to read along each of the
+        dimensions of the underlying pfb files.
     :param mode:
-        Specification of whether a single file or a sequence of files
-        should be read in.
+        Specification of whether a single file, a sequence of files,
+        or a pfb store should be read.
     :param z_first:
         Whether the z axis should be first. If not, it it will be last.
-    :param z_is:
-        What the z-axis represents. Can be 'z', 'time', or 'variable'
+    :param store_variable:
+        The variable to read when reading from a pfb store.
+    :param file_prefix:
+        A prefix, such as a base directory, to add to the file names.
     :return:
-        A numpy array of the data
+        A numpy array of the window, with all of the dimensions
+        of the underlying pfb files.
     """
+    keys = {d: {'start': start, 'stop': stop}
+            for d, (start, stop) in window.items()}
     if mode == 'single':
-        accessor = {d: util._key_to_explicit_accessor(k)
-                    for d, k in zip(dims, key)}
-        sub = read_pfb(
-            file_or_seq,
-            keys=accessor,
-            z_first=z_first,
-        )
+        return read_pfb(file_prefix + file_or_seq, keys=keys, z_first=z_first,
+                        pool=GLOBAL_READER_POOL)
     elif mode == 'sequence':
-        accessor = {d: util._key_to_explicit_accessor(k)
-                for d, k in zip(dims, key)}
-        t_start = accessor['time']['start']
-        t_end = accessor['time']['stop']
-        if z_is == 'time':
-            # WARNING:  This is pretty hacky, accounting for first timestep offset
-            try:
-                # Parflow files end with TIMESTEP.pfb
-                file_start_time = int(file_or_seq[t_start].split('.')[-2].split('_')[0]) - 1
-            except:
-                # CLM output files end with TIMESTEP.C.pfb
-                file_start_time = int(file_or_seq[t_start].split('.')[-3].split('_')[0]) - 1
-            accessor['time']['start'] -= file_start_time
-            accessor['time']['stop'] -= file_start_time
-        if t_start is not None and t_start == t_end:
-            t_end += 1
-
-        # Here we explicitly select which files we need to read
-        # to reduce the overall IO overhead. After selecting them
-        # out of the list we must remove the accessor indices
-        # because they have been used.
-        read_files = file_or_seq[t_start:t_end]
-        read_files = np.array(read_files)[accessor['time']['indices']]
-        accessor['time']['indices'] = slice(None, None, None)
-        # Read the array
+        # Files are selected by the time window, the other keys select
+        # the window within each file. Each distinct file is read once,
+        # even if it holds several timesteps.
+        t_start, t_stop = window['time']
+        files = np.asarray(
+            [file_prefix + f for f in file_or_seq[t_start:t_stop]])
+        unique_files, file_idx = np.unique(files, return_inverse=True)
         sub = read_pfb_sequence(
-            read_files,
-            keys=accessor,
+            list(unique_files),
+            keys={d: k for d, k in keys.items() if d != 'time'},
             z_first=z_first,
-            z_is=z_is,
+            pool=GLOBAL_READER_POOL,
         )
-    sub = sub[tuple([accessor[d]['indices'] for d in dims])]
-    # Check which axes need to be squeezed out. This is
-    # to distinguish between doing `ds.isel(x=[0])` which
-    # should keep the x axis (and dimension) and `ds.isel(x=0)`
-    # which should remove the x axis (and dimension).
-    axes_to_squeeze = tuple(i for i, d in enumerate(dims)
-                            if accessor[d]['squeeze'])
-    sub = np.squeeze(sub, axis=axes_to_squeeze)
-    return sub
+        return sub[file_idx]
+    elif mode == 'store':
+        return read_pfb_store(file_or_seq, store_variable, keys=keys)
+
+
+# Reading a single cell costs about as much as reading this many cells
+# of a contiguous window, see `ParflowBackendArray._use_point_reads`
+_POINT_READ_COST = 64
+
+
+class _PreferredChunks(Mapping):
+    """
+    The ``preferred_chunks`` of a ``ParflowBackendArray``, which are found
+    when they are first looked up. Finding them may read the subgrid layout
+    of the files, so variables are given these in their encoding, which
+    xarray only looks at when the variables are chunked.
+    """
+
+    def __init__(self, array):
+        self.array = array
+        self._chunks = None
+
+    def _get_chunks(self):
+        if self._chunks is None:
+            self._chunks = self.array.preferred_chunks
+        return self._chunks
+
+    def __getitem__(self, dim):
+        return self._get_chunks()[dim]
+
+    def __iter__(self):
+        return iter(self._get_chunks())
+
+    def __len__(self):
+        return len(self._get_chunks())
+
+    def __deepcopy__(self, memo):
+        # Copies of a variable's encoding share the array
+        return self
+
+    def __repr__(self):
+        if self._chunks is None:
+            return f'{type(self).__name__}(<not read>)'
+        return f'{type(self).__name__}({self._chunks!r})'
+
+
+class _LayerCache:
+    """
+    Windows of a sequence of files read with all of their layers (along z),
+    shared by the arrays of variables which are layers of the same files,
+    like CLM output. An array reading a window reads it with all of the
+    layers, when they fit in ``max_bytes`` and another open array takes
+    some of the other layers, and the other arrays take their layers from
+    here, so that loading all of the variables reads each file once.
+    Windows are dropped once every open array has taken its layers, and
+    the least recently read windows are dropped to keep the windows held
+    within ``max_bytes``.
+    """
+
+    def __init__(self, n_layers, max_bytes=None):
+        """
+        :param n_layers:
+            The number of layers (the size along z) of the files.
+        :param max_bytes:
+            The most memory held by windows. Optional, by default this is
+            dask's ``array.chunk-size``.
+        """
+        self.n_layers = n_layers
+        if max_bytes is None:
+            max_bytes = dask.utils.parse_bytes(
+                dask.config.get('array.chunk-size'))
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # (window without z) -> _CachedWindow, least recently read first
+        self._windows = OrderedDict()
+        # The layers of each open array, by a token of the array
+        self._arrays = {}
+
+    def __reduce__(self):
+        # Locks can not be pickled, so arrays sent to other processes
+        # get an empty cache of their own
+        return (_LayerCache, (self.n_layers, self.max_bytes))
+
+    def add_array(self, array, layers):
+        """
+        Register an open array which takes ``layers`` from the windows,
+        until the array is garbage collected.
+        """
+        token = object()
+        with self._lock:
+            self._arrays[token] = frozenset(layers)
+        weakref.finalize(array, self._remove_array, token)
+
+    def _remove_array(self, token):
+        """Forget an array which was garbage collected"""
+        with self._lock:
+            self._arrays.pop(token, None)
+
+    def _open_layers(self) -> set:
+        """The layers taken by the open arrays, called with the lock held"""
+        return set().union(*self._arrays.values())
+
+    def read(self, window, read_window) -> np.ndarray:
+        """
+        Read a window of the layers of one variable.
+
+        :param window:
+            A dictionary of (start, stop) indices along each dimension
+            of the files, as for ``_read_window``.
+        :param read_window:
+            The function which reads a window from the files.
+        :return:
+            A numpy array of the window.
+        """
+        z_start, z_stop = window['z']
+        layers = set(range(z_start, z_stop))
+        nbytes = int(np.prod([stop - start for d, (start, stop)
+                              in window.items() if d != 'z']))
+        nbytes *= self.n_layers * np.dtype(np.float64).itemsize
+        key = tuple((d, w) for d, w in window.items() if d != 'z')
+        with self._lock:
+            cached = self._windows.get(key)
+            is_reader = cached is None
+            if is_reader:
+                if nbytes > self.max_bytes or not (
+                        self._open_layers() - layers):
+                    cached = None
+                else:
+                    cached = self._windows[key] = _CachedWindow(nbytes)
+                    self._evict()
+            else:
+                self._windows.move_to_end(key)
+        if cached is None:
+            return read_window(window)
+        if is_reader:
+            try:
+                cached.data = read_window(
+                    dict(window, z=(0, self.n_layers)))
+            finally:
+                cached.ready.set()
+        else:
+            cached.ready.wait()
+        if cached.data is None:
+            # Reading the window failed, the error was raised for the
+            # array which read it
+            return read_window(window)
+        axis = list(window).index('z')
+        sub = cached.data[
+            (slice(None), ) * axis + (slice(z_start, z_stop), )].copy()
+        with self._lock:
+            cached.taken.update(layers)
+            if (cached.taken >= self._open_layers()
+                    and self._windows.get(key) is cached):
+                del self._windows[key]
+        return sub
+
+    def _evict(self):
+        """
+        Drop the least recently read windows until the windows fit in
+        ``max_bytes``, called with the lock held.
+        """
+        nbytes = sum(c.nbytes for c in self._windows.values())
+        while nbytes > self.max_bytes:
+            _, cached = self._windows.popitem(last=False)
+            nbytes -= cached.nbytes
+
+
+class _CachedWindow:
+    """A window held by a ``_LayerCache``, with the layers taken from it"""
+
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+        self.ready = threading.Event()
+        self.data = None
+        self.taken = set()
 
 
 class ParflowBackendArray(BackendArray):
@@ -523,6 +815,10 @@ class ParflowBackendArray(BackendArray):
          z_first=True,
          z_is='z',
          init_key={},
+         store_variable=None,
+         header=None,
+         base_dir=None,
+         layer_cache=None,
     ):
         """
         Instantiate a new ParflowBackendArray.
@@ -539,14 +835,33 @@ class ParflowBackendArray(BackendArray):
             What the z axis represents. Can be 'z', 'time', 'variable'
         :param init_key:
             An initial key that can be used to prematurely subset.
+        :param store_variable:
+            The variable to read if ``file_or_seq`` is a pfb store.
+        :param header:
+            The header of the (first) file, or a partial header with at
+            least 'nx', 'ny', and 'nz'. This is optional, if it is not
+            given it is read from the file when it is first needed.
+        :param base_dir:
+            A directory to look for the files in if they are not found
+            as given. Files are looked for when they are first read.
+        :param layer_cache:
+            A ``_LayerCache`` shared with the arrays of the other layers of
+            the files, if this array is some of the layers (along z) of
+            files which hold several variables.
         """
         self.file_or_seq = file_or_seq
-        if isinstance(self.file_or_seq, str):
+        self.store_variable = store_variable
+        self.base_dir = base_dir
+        self.layer_cache = layer_cache
+        self._file_prefix = None
+        self._header = header
+        self._chunks = None
+        if store_variable is not None:
+            self.mode = 'store'
+        elif isinstance(self.file_or_seq, str):
             self.mode = 'single'
-            self.header_file = self.file_or_seq
         elif isinstance(self.file_or_seq, Iterable):
             self.mode = 'sequence'
-            self.header_file = self.file_or_seq[0]
             # TODO: Should this be done in `load_time_varying_2d_ts_pfb`?
             if z_is == 'time' and shape is not None:
                 time_idx = np.nonzero(np.array(dims) == 'time')[0][0]
@@ -561,14 +876,32 @@ class ParflowBackendArray(BackendArray):
         self.z_first = z_first
         self.z_is = z_is
         self.init_key = init_key
+        if layer_cache is not None:
+            layers = init_key.get('z', slice(None))
+            if isinstance(layers, slice):
+                layers = range(*layers.indices(layer_cache.n_layers))
+            else:
+                layers = [layers]
+            layer_cache.add_array(self, layers)
         # Weird hack here, have to pull the dtype like this
         # to have valid `nbytes` attribute
         self.dtype = np.dtype(np.float64)
+        if self.mode == 'store':
+            store_index = read_pfb_store_index(self.file_or_seq)
+            self.dtype = np.dtype(
+                store_index['variables'][store_variable]['dtype'])
 
     def __getitem__(
             self, key: xr.core.indexing.ExplicitIndexer
     ) -> np.ndarray:
         """Dunder method to call implement the underlying indexing scheme"""
+        # Scattered points are read cell by cell, other keys (and points
+        # which are dense enough) are read as an outer indexed window
+        if (isinstance(key, indexing.VectorizedIndexer)
+                and self.mode != 'store'):
+            out_shape, grids = self._point_grids(key.tuple)
+            if self._use_point_reads(grids):
+                return self._read_points(out_shape, grids)
         return indexing.explicit_indexing_adapter(
             key,
             self.shape,
@@ -576,15 +909,74 @@ class ParflowBackendArray(BackendArray):
             self._getitem,
         )
 
+    @property
+    def file_prefix(self) -> str:
+        """
+        The prefix to add to the file names, which is ``base_dir`` if the
+        first file is not found as given. This is only checked once.
+        """
+        if self._file_prefix is None:
+            self._file_prefix = ''
+            if self.base_dir is not None:
+                first_file = (self.file_or_seq if self.mode == 'single'
+                              else self.file_or_seq[0])
+                if not os.path.exists(first_file):
+                    self._file_prefix = f'{self.base_dir}/'
+        return self._file_prefix
+
+    @property
+    def header_file(self) -> str:
+        """The file that the header is read from, None for pfb stores"""
+        if self.mode == 'store':
+            return None
+        if self.mode == 'single':
+            return self.file_prefix + self.file_or_seq
+        return self.file_prefix + self.file_or_seq[0]
+
+    @property
+    def header(self) -> Mapping[str, int]:
+        """The header of the (first) file, read when it is first needed"""
+        if self._header is None:
+            self._read_header()
+        return self._header
+
+    @property
+    def chunks(self) -> Mapping[str, tuple]:
+        """The subgrid sizes along each dimension of the (first) file"""
+        if self._chunks is None:
+            self._read_header()
+        return self._chunks
+
+    def _read_header(self):
+        """
+        Read the header and the subgrid layout of the (first) file. All
+        of the files of a sequence share these, so this is done once.
+        """
+        with ParflowBinaryReader(self.header_file) as pfd:
+            self._header = dict(pfd.header)
+            self._chunks = dict(pfd.chunks)
+
     def _set_dims_and_shape(self):
-        with ParflowBinaryReader(
-            self.header_file,
-            precompute_subgrid_info=False
-        ) as pfd:
-            if self.z_first:
-                _shape = [pfd.header['nz'], pfd.header['ny'], pfd.header['nx']]
-            else:
-                _shape = [pfd.header['nx'], pfd.header['ny'], pfd.header['nz']]
+        if self.mode == 'store':
+            store_index = read_pfb_store_index(self.file_or_seq)
+            _shape = list(
+                store_index['variables'][self.store_variable]['shape'])
+            _dims = list(PFB_STORE_DIMS)
+            self._squeeze_dims = tuple(
+                i for i, s in enumerate(_shape) if s == 1)
+            if not self._shape:
+                self._shape = tuple(s for s in _shape if s > 1)
+            if not self._dims:
+                self._dims = tuple(
+                    d for s, d in zip(_shape, _dims) if s > 1)
+            self._pfb_dims = tuple(_dims)
+            self._pfb_shape = tuple(_shape)
+            return
+        header = self.header
+        if self.z_first:
+            _shape = [header['nz'], header['ny'], header['nx']]
+        else:
+            _shape = [header['nx'], header['ny'], header['nz']]
         if self.mode == 'sequence':
             _shape = [len(self.file_or_seq), *_shape]
         # Construct dimension template
@@ -597,7 +989,7 @@ class ParflowBackendArray(BackendArray):
             if self.z_first:
                 _dims = ['time', 'z', 'y', 'x']
             else:
-                _dims = ['time', 'x', 'y', 'x']
+                _dims = ['time', 'x', 'y', 'z']
         # Add some logic for dealing with clm output's inconsistent format
         if self.init_key:
             for i, (dim, size) in enumerate(zip(_dims, _shape)):
@@ -646,17 +1038,189 @@ class ParflowBackendArray(BackendArray):
             self._set_dims_and_shape()
         return self._squeeze_dims
 
+    @property
+    def preferred_chunks(self) -> Mapping[str, tuple]:
+        """
+        Chunk sizes along each dimension which follow the layout of the
+        underlying files: whole subgrids along x, y and z, grouped until
+        chunks are about the size of dask's ``array.chunk-size``. Files
+        which fit in a chunk are not split, which does not need the subgrid
+        layout of the files, and are grouped along time instead, so that
+        long sequences of small files do not make huge task graphs. Pfb
+        stores are chunked like the store itself.
+        """
+        if self.mode == 'store':
+            var_meta = read_pfb_store_index(
+                self.file_or_seq)['variables'][self.store_variable]
+            chunks = dict(zip(PFB_STORE_DIMS, (
+                dask.array.core.normalize_chunks(c, (n,))[0]
+                for c, n in zip(var_meta['chunks'], var_meta['shape']))))
+            return {d: chunks[d] for d in self.dims}
+        cells = dask.utils.parse_bytes(
+            dask.config.get('array.chunk-size')) / self.dtype.itemsize
+        chunks = {d: (s,) for d, s in zip(self.pfb_dims, self.pfb_shape)}
+        file_cells = np.prod([chunks[d][0] for d in 'xyz'])
+        if file_cells > cells:
+            chunks = dict(self.chunks)
+            for dim, init in self.init_key.items():
+                chunks[dim] = (self._size_from_key([init])[0],)
+            # Group as many subgrids along x and y as fit in a chunk
+            nz = sum(chunks['z'])
+            sg_cells = nz * max(chunks['y']) * max(chunks['x'])
+            group = max(1, int(np.sqrt(cells / sg_cells)))
+            for dim in ['x', 'y']:
+                sizes = chunks[dim]
+                chunks[dim] = tuple(sum(sizes[i:i + group])
+                                    for i in range(0, len(sizes), group))
+            chunks['z'] = (nz,)
+        if self.mode == 'sequence':
+            n_files = len(self.file_or_seq)
+            group = max(1, int(cells // file_cells))
+            chunks['time'] = tuple(min(group, n_files - i)
+                                   for i in range(0, n_files, group))
+        return {d: chunks[d] for d in self.dims if d in chunks}
+
     def _getitem(self, key: tuple) -> np.ndarray:
         """Mapping between keys to the actual data"""
-        real_size = self._size_from_key(key)
-        sub = delayed(_getitem_no_state)(
-                self.file_or_seq, key, self.dims, self.mode,
-                self.z_first, self.z_is)
-        sub = dask.array.from_delayed(sub, self.pfb_shape, dtype=np.float64)
-        if self.shape != sub.shape:
-            sub = dask.array.squeeze(sub, axis=self.squeeze_dims)
+        # Read the bounding window of the key, then pick out the indices
+        # within it. Dimensions of length one are not in the key.
+        key = iter(key)
+        window, indices = {}, []
+        for i, (dim, size) in enumerate(zip(self.pfb_dims, self.pfb_shape)):
+            k = 0 if i in self.squeeze_dims else next(key)
+            offset = self._init_offset(dim)
+            if isinstance(k, slice):
+                start, stop, step = k.indices(size)
+                if step < 0:
+                    k = np.arange(start, stop, step)
+                else:
+                    stop = max(start, stop)
+                    window[dim] = (offset + start, offset + stop)
+                    indices.append(slice(0, stop - start, step))
+                    continue
+            if isinstance(k, (int, np.integer)):
+                k = int(k) % size
+                window[dim] = (offset + k, offset + k + 1)
+                indices.append(0)
+            else:
+                k = np.asarray(k) % size
+                start = int(k.min()) if k.size else 0
+                stop = int(k.max()) + 1 if k.size else 0
+                window[dim] = (offset + start, offset + stop)
+                indices.append(k - start)
+        if any(stop <= start for start, stop in window.values()):
+            sub = np.empty([stop - start for start, stop in window.values()],
+                           dtype=self.dtype)
+        elif self.layer_cache is not None:
+            sub = self.layer_cache.read(window, self._read_files)
+        else:
+            sub = self._read_files(window)
+        # Index one axis at a time, from the last, so that integer
+        # indices removing an axis leave the others in place
+        for axis in reversed(range(len(indices))):
+            sub = sub[(slice(None), ) * axis + (indices[axis], )]
         return sub
 
+    def _read_files(self, window) -> np.ndarray:
+        """Read a window of the underlying files, see ``_read_window``"""
+        return _read_window(
+            self.file_or_seq, window, self.mode, self.z_first,
+            self.store_variable, self.file_prefix)
+
+    def _init_offset(self, dim) -> int:
+        """Dimensions subset by the initial key start at its start"""
+        init = self.init_key.get(dim, 0)
+        if isinstance(init, slice):
+            return init.start or 0
+        return init
+
+    def _point_grids(self, key: tuple) -> tuple:
+        """
+        Find the cells selected by a vectorized key.
+
+        :param key:
+            The tuple of a ``VectorizedIndexer``: integer arrays, which are
+            broadcast against each other, and slices.
+        :return:
+            The shape of the result, which has the broadcast dimensions of
+            the arrays first and then the sliced dimensions, and a dictionary
+            with the index along each dimension of the underlying files of
+            every cell of the result (before removing dimensions of length
+            one).
+        """
+        key = iter(key)
+        full_key = [slice(None) if i in self.squeeze_dims else next(key)
+                    for i in range(len(self.pfb_dims))]
+        array_shape = np.broadcast_shapes(
+            *(k.shape for k in full_key if not isinstance(k, slice)))
+        slice_axes = [i for i, k in enumerate(full_key)
+                      if isinstance(k, slice)]
+        out_shape = list(array_shape)
+        grids = {}
+        for i, (dim, size) in enumerate(zip(self.pfb_dims, self.pfb_shape)):
+            k = full_key[i]
+            if isinstance(k, slice):
+                idx = np.arange(size)[k]
+                if i not in self.squeeze_dims:
+                    out_shape.append(len(idx))
+                grid_shape = [1] * (len(array_shape) + len(slice_axes))
+                grid_shape[len(array_shape) + slice_axes.index(i)] = -1
+                grid = idx.reshape(grid_shape)
+            else:
+                grid = np.asarray(k) % size
+                grid = grid.reshape(grid.shape + (1, ) * len(slice_axes))
+            grids[dim] = grid + self._init_offset(dim)
+        grids = dict(zip(grids, np.broadcast_arrays(*grids.values())))
+        return tuple(out_shape), grids
+
+    def _use_point_reads(self, grids) -> bool:
+        """
+        Whether reading cells one by one is cheaper than reading their
+        bounding window, see ``_POINT_READ_COST``.
+        """
+        if not grids['x'].size:
+            return True
+        window_cells = np.prod(
+            [int(grids[d].max()) - int(grids[d].min()) + 1 for d in 'xyz'])
+        if self.mode == 'sequence':
+            window_cells *= len(np.unique(grids['time']))
+        return grids['x'].size * _POINT_READ_COST < window_cells
+
+    def _read_points(self, out_shape, grids) -> np.ndarray:
+        """
+        Read the cells found by ``_point_grids`` with ``read_pfb_points``,
+        from only the files which hold them.
+        """
+        values = np.empty(grids['x'].size, dtype=self.dtype)
+        if not values.size:
+            return values.reshape(out_shape)
+        if self.mode == 'sequence':
+            times = grids['time'].ravel()
+        else:
+            times = np.zeros(values.size, dtype=np.int64)
+        cells = np.stack([grids[d].ravel() for d in 'xyz'], axis=1)
+        time_idx, file_idx = np.unique(times, return_inverse=True)
+        points, point_idx = np.unique(cells, axis=0, return_inverse=True)
+        file_idx, point_idx = file_idx.ravel(), point_idx.ravel()
+        if self.mode == 'sequence':
+            files = [self.file_prefix + self.file_or_seq[t] for t in time_idx]
+        else:
+            files = [self.header_file]
+        if len(files) * len(points) <= 2 * values.size:
+            # Every file holds most of the points, like time series at
+            # a set of locations
+            data = read_pfb_points(files, points, pool=GLOBAL_READER_POOL)
+            values[:] = data[file_idx, point_idx]
+        else:
+            # Points have their own times, each file is only read
+            # at the points it holds
+            for i, file in enumerate(files):
+                selected = file_idx == i
+                values[selected] = read_pfb_points(
+                    [file], points[point_idx[selected]],
+                    pool=GLOBAL_READER_POOL)[0]
+        return values.reshape(out_shape)
+
     def _size_from_key(self, key):
         """Determine the size of a returned array given an indexing key"""
         ret_size = []
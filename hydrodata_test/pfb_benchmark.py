@@ -0,0 +1,231 @@
+#
+# Self-contained benchmark of PFB reading and writing.
+# Synthetic PFB files are generated into a temporary directory for a range of grid sizes
+# and subgrid topologies (p, q, r from 1 to 48, including topologies with remainders), and
+# read_pfb, read_subarray windows, read_pfb_sequence, write_pfb and xarray backend slicing
+# are timed. Reads are timed hot and cold. Cold reads drop the page cache first, using
+# /proc/sys/vm/drop_caches when running as root and evicting each file with
+# posix_fadvise(DONTNEED) otherwise.
+#
+# Results are written as CSV or JSON (by the extension of the output file), and two
+# result files can be compared to flag regressions.
+#
+import sys
+import os
+import csv
+import json
+import time
+import shutil
+import platform
+import tempfile
+import statistics
+import numpy as np
+import xarray as xr
+from parflow.tools.io import read_pfb, write_pfb, read_pfb_sequence, ParflowBinaryReader
+from parflow.tools.pf_backend import ParflowBackendEntrypoint
+
+# (nz, ny, nx) grids and the (p, q, r) topologies to write each grid with
+SUITES = {
+    "quick": [
+        ((5, 250, 300), [(1, 1, 1), (7, 5, 1), (48, 48, 1)]),
+    ],
+    "full": [
+        ((1, 1000, 1200), [(1, 1, 1), (4, 4, 1), (24, 24, 1), (48, 48, 1), (47, 37, 1)]),
+        ((10, 500, 600), [(1, 1, 1), (7, 5, 3), (16, 16, 2), (48, 48, 1)]),
+        ((24, 120, 150), [(1, 1, 24), (5, 5, 5), (13, 11, 7)]),
+    ],
+}
+SEQUENCE_LENGTH = 10
+WINDOW_SIZE = 50
+RESULT_FIELDS = ["op", "grid", "topology", "cache", "median", "min", "repeats", "nbytes"]
+
+
+class CacheDropper:
+    """Drop the page cache before cold reads, in the best way permitted"""
+    def __init__(self):
+        self.method = "drop_caches" if self._can_drop_caches() else "fadvise"
+
+    def _can_drop_caches(self):
+        return os.path.exists("/proc/sys/vm/drop_caches") and os.access("/proc/sys/vm/drop_caches", os.W_OK)
+
+    def drop(self, files):
+        if self.method == "drop_caches":
+            os.sync()
+            with open("/proc/sys/vm/drop_caches", "w") as f:
+                f.write("3\n")
+            return
+        for file_path in files:
+            fd = os.open(file_path, os.O_RDONLY)
+            try:
+                if hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+
+
+def time_op(func, repeats, before=None):
+    """Run func repeats times, calling before (untimed) ahead of each run, and return the timings"""
+    timings = []
+    for _ in range(repeats):
+        if before:
+            before()
+        start_time = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start_time)
+    return timings
+
+
+def make_result(op, grid, topology, cache, timings, nbytes):
+    return {
+        "op": op,
+        "grid": "x".join(str(n) for n in grid),
+        "topology": "x".join(str(n) for n in topology),
+        "cache": cache,
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "repeats": len(timings),
+        "nbytes": int(nbytes),
+    }
+
+
+def benchmark_topology(work_dir, data, grid, topology, repeats, dropper):
+    """Time all operations for one grid and topology"""
+    results = []
+    nz, ny, nx = grid
+    p, q, r = topology
+    label = f"{nz}x{ny}x{nx}_{p}x{q}x{r}"
+    files = [f"{work_dir}/{label}.{t:05d}.pfb" for t in range(SEQUENCE_LENGTH)]
+    file_path = files[0]
+
+    def write_all():
+        for f in files:
+            write_pfb(f, data, p=p, q=q, r=r, dist=True)
+
+    timings = time_op(lambda: write_pfb(file_path, data, p=p, q=q, r=r, dist=True), repeats)
+    results.append(make_result("write_pfb", grid, topology, "hot", timings, data.nbytes))
+    write_all()
+
+    x0 = max(0, nx // 2 - WINDOW_SIZE // 2)
+    y0 = max(0, ny // 2 - WINDOW_SIZE // 2)
+    keys = {"x": {"start": x0, "stop": min(nx, x0 + WINDOW_SIZE)},
+            "y": {"start": y0, "stop": min(ny, y0 + WINDOW_SIZE)}}
+    window_bytes = 8 * nz * (keys["x"]["stop"] - x0) * (keys["y"]["stop"] - y0)
+
+    def read_window():
+        with ParflowBinaryReader(file_path) as pfb:
+            pfb.read_subarray(x0, y0, 0, WINDOW_SIZE, WINDOW_SIZE, nz)
+
+    def xr_window():
+        ds = xr.open_dataset(file_path, engine=ParflowBackendEntrypoint)
+        ds.isel(x=slice(x0, x0 + WINDOW_SIZE), y=slice(y0, y0 + WINDOW_SIZE)).load()
+
+    reads = [
+        ("read_pfb", lambda: read_pfb(file_path), [file_path], data.nbytes),
+        ("read_subarray", read_window, [file_path], window_bytes),
+        ("read_pfb_sequence", lambda: read_pfb_sequence(files), files, data.nbytes * len(files)),
+        ("read_pfb_sequence_window", lambda: read_pfb_sequence(files, keys=keys), files, window_bytes * len(files)),
+        ("xarray_window", xr_window, [file_path], window_bytes),
+    ]
+    for op, func, op_files, nbytes in reads:
+        timings = time_op(func, repeats, before=lambda: dropper.drop(op_files))
+        results.append(make_result(op, grid, topology, "cold", timings, nbytes))
+        func()
+        timings = time_op(func, repeats)
+        results.append(make_result(op, grid, topology, "hot", timings, nbytes))
+    for f in files:
+        os.remove(f)
+        if os.path.exists(f"{f}.dist"):
+            os.remove(f"{f}.dist")
+    return results
+
+
+def run_suite(suite, repeats, out_path):
+    dropper = CacheDropper()
+    work_dir = tempfile.mkdtemp(prefix="pfb_benchmark_")
+    rng = np.random.default_rng(0)
+    results = []
+    try:
+        for grid, topologies in SUITES[suite]:
+            data = rng.random(grid)
+            for topology in topologies:
+                start_time = time.time()
+                results.extend(benchmark_topology(work_dir, data, grid, topology, repeats, dropper))
+                duration = round(time.time() - start_time, 1)
+                print(f"Benchmarked grid {grid} with topology {topology} in {duration} seconds.")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    info = {"suite": suite, "repeats": repeats, "cold_method": dropper.method,
+            "python": platform.python_version(), "numpy": np.__version__,
+            "host": platform.node(), "date": time.strftime("%Y-%m-%d %H:%M:%S")}
+    write_results(out_path, results, info)
+    print(f"Wrote {len(results)} results to {out_path} (cold reads use {dropper.method}).")
+
+
+def write_results(out_path, results, info):
+    if out_path.endswith(".json"):
+        with open(out_path, "w") as f:
+            json.dump({"info": info, "results": results}, f, indent=2)
+    else:
+        with open(out_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+
+
+def read_results(path):
+    if path.endswith(".json"):
+        with open(path, "r") as f:
+            return json.load(f)["results"]
+    with open(path, "r", newline="") as f:
+        return [dict(row, median=float(row["median"]), min=float(row["min"])) for row in csv.DictReader(f)]
+
+
+def compare(baseline_path, current_path, threshold):
+    """Print the change of each result and return the number of regressions beyond threshold"""
+    def key(row):
+        return (row["op"], row["grid"], row["topology"], row["cache"])
+    baseline = {key(row): row for row in read_results(baseline_path)}
+    n_regressions = 0
+    print(f"{'op':<26}{'grid':<12}{'topology':<10}{'cache':<6}{'baseline':>10}{'current':>10}{'ratio':>8}")
+    for row in read_results(current_path):
+        base = baseline.get(key(row))
+        if base is None:
+            continue
+        # The minimum is the least noisy estimate of the cost of an operation
+        ratio = row["min"] / base["min"] if base["min"] > 0 else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            n_regressions += 1
+        elif ratio < 1 / (1 + threshold):
+            flag = "  improved"
+        print(f"{row['op']:<26}{row['grid']:<12}{row['topology']:<10}{row['cache']:<6}"
+              f"{base['min']:>10.4f}{row['min']:>10.4f}{ratio:>8.2f}{flag}")
+    print(f"{n_regressions} regressions slower by more than {threshold:.0%}.")
+    return n_regressions
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] not in ("run", "compare"):
+        print()
+        print("Usage: python pfb_benchmark.py run <results.csv|results.json> [quick|full] [<repeats>]")
+        print("       python pfb_benchmark.py compare <baseline> <current> [<threshold>]")
+        print("   where <threshold> is the slowdown flagged as a regression, default 0.2 (20%)")
+        print("   for example, python pfb_benchmark.py run before.json quick 5")
+        sys.exit(0)
+    if sys.argv[1] == "run":
+        suite = sys.argv[3] if len(sys.argv) > 3 else "quick"
+        repeats = int(sys.argv[4]) if len(sys.argv) > 4 else 3
+        if suite not in SUITES:
+            print(f"The suite must be one of {', '.join(SUITES)}")
+            sys.exit(0)
+        run_suite(suite, repeats, sys.argv[2])
+    else:
+        if len(sys.argv) < 4:
+            print("The compare command needs a baseline and a current results file")
+            sys.exit(0)
+        threshold = float(sys.argv[4]) if len(sys.argv) > 4 else 0.2
+        n_regressions = compare(sys.argv[2], sys.argv[3], threshold)
+        sys.exit(1 if n_regressions else 0)
+
+main()
@@ -0,0 +1,251 @@
+#
+# Tests of the patched parflow.tools io.py and pf_backend.py, which are copied from
+# patches/ into the parflow package by create_venv.sh. Run with
+#   python -m pytest test_pfb_patches.py
+#
+import gc
+import json
+import os
+import signal
+import time
+import tracemalloc
+import warnings
+import dask
+import numpy as np
+import pytest
+import xarray as xr
+from parflow.tools import io as pfio
+from parflow.tools import pf_backend
+from parflow.tools.pf_backend import ParflowBackendEntrypoint
+
+
+def test_write_pfb_store_keeps_file_order(tmp_path):
+    """Files are stored in the order given, even if unsorted or repeated"""
+    pytest.importorskip("blosc2")
+    rng = np.random.default_rng(0)
+    steps = [rng.random((2, 12, 14)) for _ in range(11)]
+    files = []
+    for t, data in enumerate(steps):
+        # Without zero padding, step 10 sorts before step 2
+        files.append(f"{tmp_path}/press.{t}.pfb")
+        pfio.write_pfb(files[-1], data, p=2, q=2, r=1)
+    order = [0, 1, 2, 10, 3, 3, 9, 4]
+    store_dir = f"{tmp_path}/store"
+    pfio.write_pfb_store([files[t] for t in order], store_dir, time_block=3,
+                         tile_size=(5, 5))
+    stored = pfio.read_pfb_store(store_dir, "parflow_variable")
+    np.testing.assert_array_equal(stored, np.stack([steps[t] for t in order]))
+
+
+@pytest.mark.parametrize("old, new", [((2, 2, 1), (1, 4, 1)),
+                                      ((4, 1, 1), (1, 4, 1)),
+                                      ((3, 2, 1), (2, 3, 1))])
+@pytest.mark.parametrize("shape", [(4, 30, 30), (1, 41, 37)])
+def test_stale_dist_file_is_ignored(tmp_path, old, new, shape):
+    """A .dist file left by an earlier file of the same name is not trusted"""
+    file_path = f"{tmp_path}/press.pfb"
+    data = np.random.default_rng(0).random(shape)
+    pfio.write_pfb(file_path, np.zeros_like(data), p=old[0], q=old[1], r=old[2], dist=True)
+    pfio.write_pfb(file_path, data, p=new[0], q=new[1], r=new[2], dist=False)
+    assert os.path.exists(f"{file_path}.dist")
+    np.testing.assert_array_equal(pfio.read_pfb(file_path), data)
+    with pfio.ParflowBinaryReader(file_path, p=new[0], q=new[1], r=new[2]) as pfb:
+        np.testing.assert_array_equal(pfb.read_all_subgrids(mode="full"), data)
+        assert (pfb.header["p"], pfb.header["q"], pfb.header["r"]) == new
+
+
+def test_files_without_sidecars_are_opened_without_looking_for_them(tmp_path, monkeypatch):
+    files = [f"{tmp_path}/press.{t:05d}.pfb" for t in range(20)]
+    for file_path in files:
+        pfio.write_pfb(file_path, np.ones((2, 9, 10)), p=2, q=3, r=1, dist=False)
+    opened = []
+
+    def tracked_open(file, *args, **kwargs):
+        opened.append(str(file))
+        return open(file, *args, **kwargs)
+
+    monkeypatch.setattr(pfio, "open", tracked_open, raising=False)
+    for file_path in files:
+        with pfio.ParflowBinaryReader(file_path) as pfb:
+            assert (pfb.header["p"], pfb.header["q"], pfb.header["r"]) == (2, 3, 1)
+    assert sorted(opened) == files
+
+    # Sidecars written here are found straight away
+    pfio.write_pfb_index(files[0])
+    opened.clear()
+    with pfio.ParflowBinaryReader(files[0]):
+        pass
+    assert f"{files[0]}{pfio.PFB_INDEX_SUFFIX}" in opened
+
+
+def test_failing_stats_hook_does_not_leak_readers(tmp_path):
+    file_path = f"{tmp_path}/press.pfb"
+    data = np.random.default_rng(0).random((2, 8, 8))
+    pfio.write_pfb(file_path, data, p=2, q=2, r=1)
+
+    def hook(filename, stats):
+        raise RuntimeError("export failed")
+
+    pool = pfio.ReaderPool()
+    pfio.add_reader_stats_hook(hook)
+    try:
+        with pytest.warns(RuntimeWarning, match="export failed"):
+            np.testing.assert_array_equal(pfio.read_pfb(file_path, pool=pool), data)
+        assert len(pool) == 1
+        with pytest.warns(RuntimeWarning, match="export failed"):
+            pfb = pfio.ParflowBinaryReader(file_path)
+            pfb.close()
+        assert pfb.f.closed
+    finally:
+        pfio.remove_reader_stats_hook(hook)
+        pool.clear()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_reader_pool_after_fork(tmp_path):
+    """A forked process drops the inherited readers without reporting stats"""
+    file_path = f"{tmp_path}/press.pfb"
+    pfio.write_pfb(file_path, np.ones((2, 8, 8)), p=2, q=2, r=1)
+    pool = pfio.ReaderPool()
+    with pool.reader(file_path) as pfb:
+        pfb.read_subarray(0, 0, 0, 4, 4, 2)
+    assert len(pool) == 1
+    hook_calls = []
+
+    def hook(filename, stats):
+        hook_calls.append(filename)
+
+    pfio.add_reader_stats_hook(hook)
+    # The stats lock is held while forking, as by another thread
+    pfio.GLOBAL_READER_STATS._lock.acquire()
+    try:
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                status = 0 if len(pool) == 0 and not hook_calls else 1
+            finally:
+                os._exit(status)
+    finally:
+        pfio.GLOBAL_READER_STATS._lock.release()
+        pfio.remove_reader_stats_hook(hook)
+    for _ in range(200):
+        done, status = os.waitpid(pid, os.WNOHANG)
+        if done:
+            break
+        time.sleep(0.05)
+    else:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+        pytest.fail("The forked process deadlocked")
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert len(pool) == 1
+    pool.clear()
+
+
+def test_large_grids_are_opened_without_reading_their_files(tmp_path):
+    """Variables larger than a chunk only read their subgrid layout when chunked"""
+    data = np.random.default_rng(0).random((3, 4, 30, 40))
+    files = [f"{tmp_path}/press.{t:05d}.pfb" for t in range(3)]
+    for t in range(1, 3):
+        pfio.write_pfb(files[t], data[t], p=2, q=3, r=1)
+    # The header of the first file is not there to be read
+    meta = {"parflow": {"build": {"version": "test"}},
+            "domains": {"subsurface": {"cell-extent": [40, 30, 4]}},
+            "outputs": {"pressure": {"type": "pfb", "time-varying": True,
+                                     "domain": "subsurface", "data": [
+                {"file-series": "press.%05d.pfb", "time-range": [0, 3]}]}},
+            "inputs": {}}
+    meta_file = f"{tmp_path}/run.pfmetadata"
+    with open(meta_file, "w") as f:
+        json.dump(meta, f)
+    with dask.config.set({"array.chunk-size": "8KiB"}):
+        pfio.GLOBAL_READER_STATS.reset()
+        ds = xr.open_dataset(meta_file, engine=ParflowBackendEntrypoint)
+        assert ds["pressure"].shape == (3, 4, 30, 40)
+        assert pfio.GLOBAL_READER_STATS.files_opened == 0
+        # The layout is read once the chunks are needed
+        pfio.write_pfb(files[0], data[0], p=2, q=3, r=1)
+        assert dict(ds["pressure"].encoding["preferred_chunks"]) == {
+            "time": (1, 1, 1), "z": (4,), "y": (10, 10, 10), "x": (20, 20)}
+        assert pfio.GLOBAL_READER_STATS.files_opened == 1
+        ds = xr.open_dataset(meta_file, engine=ParflowBackendEntrypoint, chunks={})
+        assert ds["pressure"].chunks == ((1, 1, 1), (4,), (10, 10, 10), (20, 20))
+    np.testing.assert_array_equal(ds["pressure"].values, data)
+
+
+def write_clm_output(out_dir, data):
+    """Write one CLM output file per timestep of data, and a pfmetadata file for them"""
+    for t in range(data.shape[0]):
+        pfio.write_pfb(f"{out_dir}/clm_output.{t + 1:05d}.C.pfb", data[t], p=2, q=2, r=1)
+    meta = {"parflow": {"build": {"version": "test"}},
+            "outputs": {"clm_output": {"type": "clm_output", "data": [
+                {"file-series": "clm_output.%05d.C.pfb", "time-range": [1, data.shape[0] + 1]}]}},
+            "inputs": {}}
+    meta_file = f"{out_dir}/run.pfmetadata"
+    with open(meta_file, "w") as f:
+        json.dump(meta, f)
+    return meta_file
+
+
+def open_clm_output(meta_file):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return xr.open_dataset(meta_file, engine=ParflowBackendEntrypoint, cache=False)
+
+
+def count_file_reads(monkeypatch):
+    """Count the files read by the backend, returning the list they are added to"""
+    files_read = []
+
+    def read_pfb_sequence(files, *args, **kwargs):
+        files_read.extend(files)
+        return pfio.read_pfb_sequence(files, *args, **kwargs)
+
+    monkeypatch.setattr(pf_backend, "read_pfb_sequence", read_pfb_sequence)
+    return files_read
+
+
+def test_clm_output_reads_each_file_once(tmp_path, monkeypatch):
+    data = np.random.default_rng(0).random((5, 17, 9, 11))
+    ds = open_clm_output(write_clm_output(tmp_path, data))
+    assert list(ds.data_vars) == list(pfio.CLM_OUTPUT_VARIABLES)
+    files_read = count_file_reads(monkeypatch)
+    ds.load()
+    assert len(files_read) == 5
+    for i, name in enumerate(pfio.CLM_OUTPUT_VARIABLES[:-1]):
+        np.testing.assert_array_equal(ds[name].values, data[:, i])
+    np.testing.assert_array_equal(ds["t_soil"].values, data[:, 13:])
+
+
+def measure_memory(func):
+    """Run func, returning its result with the peak and retained memory it allocated"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        result = func()
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak - start, current - start - result.nbytes
+
+
+def test_clm_output_single_variable_memory(tmp_path):
+    """Reading one variable does not read or keep all of the layers of large windows"""
+    data = np.random.default_rng(0).random((20, 14, 200, 300))
+    meta_file = write_clm_output(tmp_path, data)
+    ds = open_clm_output(meta_file)
+    values, peak, retained = measure_memory(lambda: ds["eflx_lh_tot"].values)
+    np.testing.assert_array_equal(values, data[:, 0])
+    assert peak < 3 * values.nbytes
+    assert retained < values.nbytes / 10
+
+    # Windows which fit are only kept for the other open variables
+    with dask.config.set({"array.chunk-size": "512MiB"}):
+        var = open_clm_output(meta_file)["swe_out"]
+    values, peak, retained = measure_memory(lambda: var.values)
+    np.testing.assert_array_equal(values, data[:, 10])
+    assert peak < 3 * values.nbytes
+    assert retained < values.nbytes / 10